@@ -0,0 +1,274 @@
+"""Benchmarks the hot paths of the site.
+
+Drives the app in-process through Flask's test client and over real sockets
+against a local threaded werkzeug server, and reports throughput and p50/p95/
+p99 latency for each scenario. Run from ``src/``:
+
+    python bench.py                          # both modes, print a report
+    python bench.py --save baseline.json     # also store the results
+    python bench.py --baseline baseline.json # exit 1 if anything regressed
+
+Every mode is run --repeat times and each figure is the median of the runs.
+The regression check compares throughput and p50 at --tolerance and the tail
+percentiles at the looser --tail-tolerance, and never flags a difference
+smaller than the run-to-run spread seen in either the baseline or this run.
+
+Rate limiting and mail are switched off and submissions and logs go to a
+temporary directory, so the numbers measure the handlers rather than the limits. Run
+``python index.py generate`` first so the static files exist.
+"""
+import argparse
+import http.client
+import itertools
+import json
+import logging
+import math
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from urllib.parse import urlencode
+
+from flask import url_for
+from werkzeug.serving import make_server
+
+from index import app, log_writer, submissions
+
+# name: (method, path or static filename, form fields)
+SCENARIOS = {
+    'GET /': ('GET', '/', None),
+    'GET /about': ('GET', '/about', None),
+    'POST /contact valid': ('POST', '/contact',
+                            {'name': 'Bench', 'email': 'bench@example.com', 'message': None}),
+    'POST /contact invalid-email': ('POST', '/contact',
+                                    {'name': 'Bench', 'email': 'bench', 'message': 'Hello'}),
+    'POST /contact missing-field': ('POST', '/contact',
+                                    {'name': 'Bench', 'email': '', 'message': 'Hello'}),
+    'GET style.css': ('GET', 'static:css/style.css', None),
+    'GET script.js': ('GET', 'static:js/script.js', None),
+    'GET favicon.ico': ('GET', 'static:favicon.ico', None),
+}
+
+PERCENTILES = (50, 95, 99)
+FIGURES = ('throughput',) + tuple(f'p{p}' for p in PERCENTILES)
+TAIL_FIGURES = tuple(f'p{p}' for p in PERCENTILES if p > 50)
+
+def configure(database_dir):
+    """Turns off the limits and side effects that would skew the numbers."""
+    app.config.update(
+        RATELIMIT_ENABLED=False,
+        MAIL_SERVER=None,
+        CONTACT_DB_PATH=os.path.join(database_dir, 'bench.sqlite3'),
+        LOG_PATH=os.path.join(database_dir, 'bench.log'),
+    )
+
+def resolve_paths():
+    """Maps each scenario to its request path, with hashed static URLs."""
+    paths = {}
+    with app.test_request_context():
+        for name, (method, target, _) in SCENARIOS.items():
+            if target.startswith('static:'):
+                target = url_for('static', filename=target[len('static:'):])
+            paths[name] = target
+    return paths
+
+_serial = itertools.count()
+
+def form_body(fields):
+    """Encodes a scenario's form; a None message is made unique per request
+    so valid submissions are not dropped by the duplicate filter."""
+    values = {key: value if value is not None else f'Benchmark message {next(_serial)}'
+              for key, value in fields.items()}
+    return urlencode(values)
+
+def percentile(sorted_values, p):
+    """Nearest-rank percentile of a sorted list."""
+    rank = max(1, math.ceil(p / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+def summarize(latencies, elapsed):
+    latencies.sort()
+    result = {'requests': len(latencies), 'throughput': len(latencies) / elapsed}
+    for p in PERCENTILES:
+        result[f'p{p}'] = percentile(latencies, p) * 1000
+    return result
+
+def aggregate(runs):
+    """Combines repeated runs into per-figure medians and relative spreads."""
+    combined = {}
+    for name in runs[0]:
+        samples = [run[name] for run in runs]
+        result = {'requests': sum(sample['requests'] for sample in samples),
+                  'repeats': len(samples), 'spread': {}}
+        for key in FIGURES:
+            values = sorted(sample[key] for sample in samples)
+            median = statistics.median(values)
+            result[key] = median
+            result['spread'][key] = (values[-1] - values[0]) / median if median else 0.0
+        combined[name] = result
+    return combined
+
+def run_in_process(paths, requests, warmup):
+    """Times each scenario sequentially through the test client."""
+    results = {}
+    client = app.test_client()
+    for name, (method, _, fields) in SCENARIOS.items():
+        path = paths[name]
+        def call():
+            if method == 'POST':
+                response = client.post(path, data=form_body(fields),
+                                       content_type='application/x-www-form-urlencoded')
+            else:
+                response = client.get(path)
+            response.get_data()
+            response.close()
+        for _ in range(warmup):
+            call()
+        latencies = []
+        started = time.perf_counter()
+        for _ in range(requests):
+            t0 = time.perf_counter()
+            call()
+            latencies.append(time.perf_counter() - t0)
+        results[name] = summarize(latencies, time.perf_counter() - started)
+    return results
+
+def run_over_sockets(paths, requests, warmup, concurrency):
+    """Times each scenario with keep-alive clients against a local server."""
+    # Logging every request would dominate the timings
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+    server = make_server('127.0.0.1', 0, app, threaded=True)
+    # Keep-alive needs HTTP/1.1; werkzeug answers with Content-Length
+    server.RequestHandlerClass.protocol_version = 'HTTP/1.1'
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    results = {}
+    try:
+        for name, (method, _, fields) in SCENARIOS.items():
+            path = paths[name]
+            headers = {'Content-Type': 'application/x-www-form-urlencoded'} if fields else {}
+
+            def worker(count, latencies):
+                conn = http.client.HTTPConnection('127.0.0.1', server.port, timeout=10)
+                try:
+                    for _ in range(count):
+                        body = form_body(fields) if fields else None
+                        t0 = time.perf_counter()
+                        conn.request(method, path, body=body, headers=headers)
+                        conn.getresponse().read()
+                        if latencies is not None:
+                            latencies.append(time.perf_counter() - t0)
+                finally:
+                    conn.close()
+
+            def run(total, latencies):
+                share, extra = divmod(total, concurrency)
+                threads = [threading.Thread(target=worker,
+                                            args=(share + (i < extra), latencies))
+                           for i in range(concurrency)]
+                for t in threads:
+                    t.start()
+                for t in threads:
+                    t.join()
+
+            run(warmup, None)
+            latencies = []
+            started = time.perf_counter()
+            run(requests, latencies)
+            results[name] = summarize(latencies, time.perf_counter() - started)
+    finally:
+        server.shutdown()
+        thread.join()
+    return results
+
+def print_report(results):
+    print(f"{'mode':<10} {'scenario':<30} {'req/s':>10} "
+          + ' '.join(f"{f'p{p} ms':>9}" for p in PERCENTILES) + f" {'p50 spread':>10}")
+    for mode, scenarios in results.items():
+        for name, r in scenarios.items():
+            print(f"{mode:<10} {name:<30} {r['throughput']:>10.0f} "
+                  + ' '.join(f"{r[f'p{p}']:>9.3f}" for p in PERCENTILES)
+                  + f" {r['spread']['p50']:>10.0%}")
+
+def compare(results, baseline, tolerance, tail_tolerance):
+    """Returns a line per figure that is worse than baseline beyond what is allowed.
+
+    A figure may be off by its tolerance or by the larger run-to-run spread
+    of the baseline and this run, whichever is greater.
+    """
+    regressions = []
+    for mode, scenarios in results.items():
+        for name, r in scenarios.items():
+            before = baseline.get(mode, {}).get(name)
+            if before is None:
+                continue
+            for key in FIGURES:
+                allowed = max(tail_tolerance if key in TAIL_FIGURES else tolerance,
+                              before.get('spread', {}).get(key, 0.0), r['spread'][key])
+                if key == 'throughput':
+                    if r[key] < before[key] / (1 + allowed):
+                        regressions.append(f"{mode} {name}: throughput {r[key]:.0f} req/s "
+                                           f"(baseline {before[key]:.0f}, allowed {allowed:.0%})")
+                elif r[key] > before[key] * (1 + allowed):
+                    regressions.append(f"{mode} {name}: {key} {r[key]:.3f} ms "
+                                       f"(baseline {before[key]:.3f}, allowed {allowed:.0%})")
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark the site\'s hot paths.')
+    parser.add_argument('--mode', choices=('inprocess', 'socket', 'both'), default='both')
+    parser.add_argument('--requests', '-n', type=int, default=500,
+                        help='Timed requests per scenario and run.')
+    parser.add_argument('--repeat', '-r', type=int, default=5,
+                        help='Runs per mode; figures are the median of the runs.')
+    parser.add_argument('--warmup', type=int, default=200,
+                        help='Untimed requests per scenario before timing.')
+    parser.add_argument('--concurrency', '-c', type=int, default=4,
+                        help='Concurrent connections in socket mode.')
+    parser.add_argument('--save', metavar='PATH', help='Write the results as JSON.')
+    parser.add_argument('--baseline', metavar='PATH',
+                        help='Compare against saved results; exit 1 on regression.')
+    parser.add_argument('--tolerance', type=float, default=0.2,
+                        help='Allowed throughput and p50 slowdown against the baseline '
+                             '(0.2 = 20%%).')
+    parser.add_argument('--tail-tolerance', type=float, default=1.0,
+                        help='Allowed p95 and p99 slowdown against the baseline.')
+    args = parser.parse_args(argv)
+
+    if not os.path.isdir(app.static_folder):
+        raise SystemExit("No static files yet. Run 'python index.py generate' first.")
+
+    results = {}
+    with tempfile.TemporaryDirectory() as database_dir:
+        configure(database_dir)
+        paths = resolve_paths()
+        if args.mode in ('inprocess', 'both'):
+            results['inprocess'] = aggregate([
+                run_in_process(paths, args.requests, args.warmup)
+                for _ in range(args.repeat)])
+        if args.mode in ('socket', 'both'):
+            results['socket'] = aggregate([
+                run_over_sockets(paths, args.requests, args.warmup, args.concurrency)
+                for _ in range(args.repeat)])
+        submissions.close()
+        log_writer.close()
+
+    print_report(results)
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.tolerance, args.tail_tolerance)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) against {args.baseline}:")
+            for line in regressions:
+                print(f"  {line}")
+            return 1
+        print(f"\nNo regressions against {args.baseline}.")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
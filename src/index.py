@@ -1,71 +1,2480 @@
-# app.py
+# index.py
+import asyncio
+import atexit
+import bisect
+import concurrent.futures
+import gc
+import gzip
+import hashlib
+import io
+import ipaddress
+import json
+import logging
+import math
+import mimetypes
+import mmap
+import multiprocessing
 import os
-from flask import Flask, render_template, request, redirect, url_for, flash
+import queue
+import random
+import re
+import shutil
+import smtplib
+import sqlite3
+import struct
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from array import array
+from collections import OrderedDict
+from datetime import datetime, timezone
+from email.message import EmailMessage
+
+import click
+from flask import (Flask, render_template, request, redirect, url_for,
+                   abort, jsonify, send_from_directory, g, request_started,
+                   request_finished, before_render_template, template_rendered)
+from flask.logging import default_handler
+from flask.sessions import SecureCookieSessionInterface
+from itsdangerous import BadSignature, URLSafeTimedSerializer
+from jinja2 import DictLoader, FileSystemBytecodeCache
+from markupsafe import Markup, escape
+from werkzeug.datastructures import Headers
+from werkzeug.formparser import parse_form_data
+from werkzeug.http import parse_accept_header
+from werkzeug.middleware.proxy_fix import ProxyFix
+from werkzeug.security import safe_join
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
 
 app = Flask(__name__)
-app.secret_key = os.urandom(24) # Required for flashing messages
+
+# --- Background workers ---
+# Log records and contact submissions are handed to a bounded in-process
+# queue and written by a background thread in batches, so the request never
+# waits on I/O. Each process creates its own queue and thread on first use,
+# so a prefork server gets one worker per process rather than a dead thread
+# inherited across fork().
+class BatchWorker:
+    """Bounded per-process queue drained in batches by a background thread.
+
+    Subclasses name the config keys for the queue size, batch size and flush
+    interval, and implement _run() on top of _batches().
+    """
+
+    _STOP = object()
+    thread_name = 'batch-worker'
+    queue_size_key = batch_size_key = flush_interval_key = None
+
+    def __init__(self, app):
+        self.app = app
+        self._lock = threading.Lock()
+        self._pid = None
+        self._queue = None
+        self._thread = None
+
+    def _reset(self):
+        """Clears per-process state before a new worker thread starts."""
+
+    def _ensure_started(self):
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._queue = queue.Queue(maxsize=self.app.config[self.queue_size_key])
+            self._reset()
+            self._thread = threading.Thread(target=self._run, name=self.thread_name,
+                                            daemon=True)
+            self._thread.start()
+            self._pid = os.getpid()
+
+    def close(self, timeout=5):
+        """Flushes pending items and stops the worker of this process."""
+        if self._pid != os.getpid():
+            return
+        self._pid = None
+        try:
+            self._queue.put(self._STOP, timeout=timeout)
+        except queue.Full:
+            return
+        self._thread.join(timeout)
+
+    def _batches(self):
+        """Yields non-empty batches until close(): up to the batch size, or
+        whatever arrived within the flush interval of the first item."""
+        config = self.app.config
+        stopping = False
+        while not stopping:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + config[self.flush_interval_key]
+            while len(batch) < config[self.batch_size_key]:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            if self._STOP in batch:
+                stopping = True
+                batch = [item for item in batch if item is not self._STOP]
+                while True:
+                    try:
+                        batch.append(self._queue.get_nowait())
+                    except queue.Empty:
+                        break
+            if batch:
+                yield batch
+
+    def _run(self):
+        raise NotImplementedError
+
+# --- Logging ---
+# app.logger writes JSON lines, one object per record, and never blocks the
+# caller: records go onto a bounded in-process queue (overflow is counted and
+# reported rather than waited on) and a background thread per process formats
+# and writes them in batches of up to LOG_BATCH_SIZE, at most
+# LOG_FLUSH_INTERVAL seconds apart. LOG_PATH names the file to append to
+# (stderr if unset); it is rotated to LOG_PATH.1 ... LOG_PATH.<LOG_BACKUP_COUNT>
+# once it would grow past LOG_MAX_BYTES, and workers sharing the file reopen
+# it when another worker rotated it. Structured fields are passed as
+# ``extra={'fields': {...}}``.
+app.config.update(
+    LOG_LEVEL='INFO',
+    LOG_PATH=None,
+    LOG_MAX_BYTES=10 * 1024 * 1024,
+    LOG_BACKUP_COUNT=5,
+    LOG_QUEUE_SIZE=10000,
+    LOG_BATCH_SIZE=256,
+    LOG_FLUSH_INTERVAL=0.5,
+)
+
+class JSONFormatter(logging.Formatter):
+    """Formats a record as a single-line JSON object."""
+
+    def format(self, record):
+        entry = {
+            'ts': datetime.fromtimestamp(record.created, timezone.utc).isoformat(
+                timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'pid': record.process,
+            'message': record.getMessage(),
+        }
+        entry.update(getattr(record, 'fields', None) or {})
+        if record.exc_text:
+            entry['exc'] = record.exc_text
+        return json.dumps(entry, default=str)
+
+class LogWriter(BatchWorker):
+    """Bounded queue of log records written out by a background thread."""
+
+    thread_name = 'log-writer'
+    queue_size_key = 'LOG_QUEUE_SIZE'
+    batch_size_key = 'LOG_BATCH_SIZE'
+    flush_interval_key = 'LOG_FLUSH_INTERVAL'
+
+    def __init__(self, app):
+        super().__init__(app)
+        self.formatter = JSONFormatter()
+        self.dropped = 0
+        self._stream = None
+        self._stream_path = None
+
+    def _reset(self):
+        self._stream = self._stream_path = None
+
+    def put(self, record):
+        """Enqueues a record; drops it if the queue is full."""
+        self._ensure_started()
+        try:
+            self._queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def _run(self):
+        for batch in self._batches():
+            lines = []
+            for record in batch:
+                try:
+                    lines.append(self.formatter.format(record))
+                except Exception:
+                    lines.append(json.dumps({'level': 'ERROR', 'logger': record.name,
+                                             'message': 'unformattable log record'}))
+            if self.dropped:
+                dropped, self.dropped = self.dropped, 0
+                lines.append(self.formatter.format(logging.makeLogRecord({
+                    'name': self.app.logger.name, 'levelno': logging.WARNING,
+                    'levelname': 'WARNING', 'msg': 'log queue full; records dropped',
+                    'fields': {'dropped': dropped}})))
+            self._write('\n'.join(lines) + '\n')
+        if self._stream is not None:
+            self._stream.close()
+
+    def _write(self, text):
+        path = self.app.config['LOG_PATH']
+        if not path:
+            sys.stderr.write(text)
+            sys.stderr.flush()
+            return
+        data = text.encode('utf-8')
+        try:
+            self._open(path)
+            max_bytes = self.app.config['LOG_MAX_BYTES']
+            position = self._stream.tell()
+            if max_bytes and position and position + len(data) > max_bytes:
+                self._rotate(path)
+            self._stream.write(data)
+            self._stream.flush()
+        except OSError as e:
+            sys.stderr.write(f'Cannot write log file {path}: {e}\n')
+            sys.stderr.write(text)
+
+    def _open(self, path):
+        """Opens path, or reopens it if it was rotated by another process."""
+        if self._stream is not None and self._stream_path == path:
+            try:
+                if os.stat(path).st_ino == os.fstat(self._stream.fileno()).st_ino:
+                    return
+            except FileNotFoundError:
+                pass
+            self._stream.close()
+        self._stream = open(path, 'ab')
+        self._stream_path = path
+
+    def _rotate(self, path):
+        lock = open(path + '.lock', 'a')
+        try:
+            if fcntl is not None:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+            # Another worker may have rotated while we waited for the lock
+            if os.stat(path).st_ino == os.fstat(self._stream.fileno()).st_ino:
+                count = self.app.config['LOG_BACKUP_COUNT']
+                for i in range(count - 1, 0, -1):
+                    if os.path.exists(f'{path}.{i}'):
+                        os.replace(f'{path}.{i}', f'{path}.{i + 1}')
+                if count:
+                    os.replace(path, f'{path}.1')
+                else:
+                    os.truncate(path, 0)
+            self._stream.close()
+            self._stream = open(path, 'ab')
+        finally:
+            lock.close()
+
+class QueueLogHandler(logging.Handler):
+    """Hands records to the LogWriter; the caller only pays for the enqueue."""
+
+    def __init__(self, writer):
+        super().__init__()
+        self.writer = writer
+
+    def emit(self, record):
+        # Resolve everything that refers to caller state before crossing threads
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        self.writer.put(record)
+
+log_writer = LogWriter(app)
+atexit.register(log_writer.close)
+
+app.logger.removeHandler(default_handler)
+app.logger.addHandler(QueueLogHandler(log_writer))
+app.logger.setLevel(app.config['LOG_LEVEL'])
+app.logger.propagate = False
+
+# --- Secret keys ---
+# Every worker and node must sign with the same key, so it is loaded from the
+# environment: SECRET_KEY holds a single key, or SECRET_KEY_FILE names a file
+# with one key per line. The first line signs; the remaining lines are older
+# keys that are still accepted, so keys can be rotated by prepending a new one.
+def load_secret_keys():
+    """Returns the configured signing keys, newest first, or an empty list."""
+    path = os.environ.get('SECRET_KEY_FILE')
+    if path:
+        with open(path) as f:
+            return [line.strip() for line in f if line.strip() and not line.startswith('#')]
+    key = os.environ.get('SECRET_KEY')
+    return [key] if key else []
+
+_secret_keys = load_secret_keys()
+if _secret_keys:
+    app.secret_key = _secret_keys[0]
+    app.config['SECRET_KEY_FALLBACKS'] = _secret_keys[1:]
+else:
+    # Only safe with a single process: other workers cannot verify its signatures
+    app.logger.warning("SECRET_KEY/SECRET_KEY_FILE not set; using a random per-process key.")
+    app.secret_key = os.urandom(24)
+
+# --- Contact status tokens ---
+# The outcome of a form submission travels to the page it redirects to as a
+# short signed token in the query string (?s=...) instead of a flash message
+# in the session, so any worker can render it and the page stays cacheable.
+STATUS_MESSAGES = {
+    'accepted': ('Thank you for your message! We will get back to you soon.', 'success'),
+    'missing': ('All fields are required!', 'danger'),
+    'invalid_email': ('Please enter a valid email address.', 'danger'),
+    'busy': ('We are receiving a lot of messages right now. Please try again shortly.', 'warning'),
+}
+STATUS_TOKEN_MAX_AGE = 600
+
+def _status_serializer():
+    # itsdangerous signs with the last key and accepts any of them
+    keys = list(reversed(app.config.get('SECRET_KEY_FALLBACKS') or [])) + [app.secret_key]
+    return URLSafeTimedSerializer(keys, salt='contact-status')
+
+def redirect_with_status(endpoint, status):
+    """Redirects to endpoint carrying a signed status code."""
+    token = _status_serializer().dumps(status)
+    return redirect(url_for(endpoint, s=token))
+
+def request_status():
+    """Returns the verified status code of the current request, or None."""
+    token = request.args.get('s')
+    if not token:
+        return None
+    try:
+        status = _status_serializer().loads(token, max_age=STATUS_TOKEN_MAX_AGE)
+    except BadSignature:
+        return None
+    return status if status in STATUS_MESSAGES else None
+
+# --- Page cache ---
+# Finished HTML for the static pages, keyed by (template, script root, status).
+# The status message is the only per-visitor content in these templates, so
+# every page is served from here.
+_page_cache = {}
+_template_version_cache = None
+
+def _template_version():
+    """Returns (digest of the template sources, mtime of this module).
+
+    Templates are loaded from TEMPLATES, so they only change with the module
+    itself and the version is computed once per process.
+    """
+    global _template_version_cache
+    if _template_version_cache is None:
+        digest = hashlib.blake2b(digest_size=16)
+        for name in sorted(TEMPLATES):
+            digest.update(f'{name}\0{TEMPLATES[name]}\0'.encode('utf-8'))
+        _template_version_cache = (digest.hexdigest(), os.stat(__file__).st_mtime_ns)
+    return _template_version_cache
+
+def _content_etag(data):
+    """Returns a strong ETag value for a byte string."""
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+def render_page(template_name, status=None):
+    """Renders a template, reusing the cached bytes for the same status.
+
+    ``status`` is a STATUS_MESSAGES code shown as an alert. Cached pages carry
+    a strong ETag and the module's mtime as Last-Modified, and conditional
+    requests are answered with 304.
+    """
+    status_messages = [STATUS_MESSAGES[status][::-1]] if status else []
+    version = _template_version()
+    key = (template_name, request.script_root, status)
+    entry = _page_cache.get(key)
+    if entry is None or entry[0] != version:
+        body = render_template(template_name, status_messages=status_messages).encode('utf-8')
+        last_modified = datetime.fromtimestamp(version[1] / 1e9, timezone.utc)
+        entry = (version, body, _content_etag(body), last_modified)
+        _page_cache[key] = entry
+    response = app.response_class(entry[1], mimetype='text/html')
+    response.set_etag(entry[2])
+    response.last_modified = entry[3]
+    return response.make_conditional(request)
+
+# --- Static files ---
+# Flask's default static ETag is derived from mtime and size, which differs
+# between hosts for identical files. Serve static files with a content hash
+# instead, cached per path until the file's mtime or size changes.
+_static_etags = {}
+
+def _file_etag(path):
+    """Returns the content-hash ETag of a file, hashing it only when it changed."""
+    st = os.stat(path)
+    cached = _static_etags.get(path)
+    if cached is not None and cached[0] == (st.st_mtime_ns, st.st_size):
+        return cached[1]
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(65536), b''):
+            digest.update(chunk)
+    etag = digest.hexdigest()
+    _static_etags[path] = ((st.st_mtime_ns, st.st_size), etag)
+    return etag
+
+# Precompressed siblings written by ``build_assets``, in order of preference.
+PRECOMPRESSED_ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+PRECOMPRESSED_EXTENSIONS = ('.css', '.js', '.svg', '.txt', '.html', '.xml', '.map')
+
+def _precompressed_variant(filename, path):
+    """Picks the best up-to-date precompressed sibling the client accepts."""
+    accepted = request.accept_encodings
+    source_mtime = os.stat(path).st_mtime_ns
+    for encoding, suffix in PRECOMPRESSED_ENCODINGS:
+        if not accepted[encoding]:
+            continue
+        try:
+            if os.stat(path + suffix).st_mtime_ns >= source_mtime:
+                return encoding, filename + suffix
+        except FileNotFoundError:
+            continue
+    return None, filename
+
+def static_file(filename):
+    """Serves a file from the static folder with a strong ETag and Last-Modified.
+
+    Text assets are sent from their .br/.gz sibling when the client accepts
+    it. Content-hashed files produced by ``build_assets`` never change under
+    the same name, so they are marked immutable for a year.
+    """
+    path = safe_join(app.static_folder, filename)
+    if path is None or not os.path.isfile(path):
+        abort(404)
+    encoding = None
+    send_name = filename
+    if filename.endswith(PRECOMPRESSED_EXTENSIONS):
+        encoding, send_name = _precompressed_variant(filename, path)
+    kwargs = {'etag': _file_etag(os.path.join(app.static_folder, send_name)),
+              'mimetype': mimetypes.guess_type(filename)[0]}
+    if filename in _hashed_assets():
+        kwargs['max_age'] = 31536000
+    # A path (not an open file) lets the WSGI server use wsgi.file_wrapper/sendfile
+    response = send_from_directory(app.static_folder, send_name, **kwargs)
+    # send_file() always names the file; static assets are not downloads
+    response.headers.pop('Content-Disposition', None)
+    if 'max_age' in kwargs:
+        response.cache_control.immutable = True
+    if filename.endswith(PRECOMPRESSED_EXTENSIONS):
+        response.vary.add('Accept-Encoding')
+        if encoding is not None:
+            response.content_encoding = encoding
+    return response
+
+app.view_functions['static'] = static_file
+
+# --- Asset manifest ---
+# ``build_assets`` copies each stylesheet and script to a content-hashed name
+# (css/style.css -> css/style.3f9a1c0b2e.css) and records the mapping in
+# static/manifest.json. url_for('static', ...) resolves names through it.
+ASSET_MANIFEST = 'manifest.json'
+HASHED_ASSET_EXTENSIONS = ('.css', '.js')
+_HASHED_NAME = re.compile(r'\.[0-9a-f]{10}\.[a-z]+$')
+_manifest_cache = None
+
+def _write_atomic(path, data):
+    """Writes bytes to path via a temporary file and rename."""
+    directory = os.path.dirname(path) or '.'
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.tmp-')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        # mkstemp creates 0600 files; static files must be readable by a web server
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+def _write_if_changed(path, data):
+    """Writes text or bytes to path atomically, only if the file's content differs.
+
+    Returns True when the file was written. Unchanged files keep their mtime,
+    so ETags, Last-Modified and the template version stay stable.
+    """
+    if isinstance(data, str):
+        data = data.encode('utf-8')
+    try:
+        with open(path, 'rb') as f:
+            if f.read() == data:
+                return False
+    except FileNotFoundError:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+    _write_atomic(path, data)
+    return True
+
+def _write_hashed(logical, data):
+    """Writes data to a content-hashed variant of a static path; returns that path."""
+    stem, ext = os.path.splitext(logical)
+    digest = hashlib.blake2b(data, digest_size=16).hexdigest()[:10]
+    hashed = f'{stem}.{digest}{ext}'
+    target = os.path.join(app.static_folder, hashed)
+    if not os.path.exists(target):
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        _write_atomic(target, data)
+    return hashed
+
+def _asset_manifest():
+    """Returns the logical -> hashed filename mapping, or an empty dict."""
+    global _manifest_cache
+    if _manifest_cache is None or app.debug:
+        path = os.path.join(app.static_folder, ASSET_MANIFEST)
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except FileNotFoundError:
+            mtime = None
+        if _manifest_cache is None or _manifest_cache[0] != mtime:
+            manifest = {}
+            if mtime is not None:
+                with open(path) as f:
+                    manifest = json.load(f)
+            _manifest_cache = (mtime, manifest, frozenset(manifest.values()))
+            # Cached pages embed the old asset URLs
+            _page_cache.clear()
+    return _manifest_cache[1]
+
+def _hashed_assets():
+    """Returns the set of content-hashed filenames in the manifest."""
+    _asset_manifest()
+    return _manifest_cache[2]
+
+def build_assets():
+    """Writes minified, content-hashed copies of the static CSS/JS, the image
+    variants, critical CSS and vendored libraries, and the manifest."""
+    static_root = app.static_folder
+    manifest = {}
+    for dirpath, _, filenames in os.walk(static_root):
+        for filename in sorted(filenames):
+            stem, ext = os.path.splitext(filename)
+            if ext not in HASHED_ASSET_EXTENSIONS or _HASHED_NAME.search(filename):
+                continue
+            source = os.path.join(dirpath, filename)
+            with open(source, encoding='utf-8') as f:
+                text = f.read()
+            text = minify_css(text) if ext == '.css' else minify_js(text)
+            if source == os.path.join(static_root, 'css', 'style.css'):
+                manifest.update(build_critical_css(text))
+            logical = os.path.relpath(source, static_root).replace(os.sep, '/')
+            manifest[logical] = _write_hashed(logical, text.encode('utf-8'))
+    manifest.update(build_images())
+    manifest.update(build_vendor())
+    _write_if_changed(os.path.join(static_root, ASSET_MANIFEST),
+                      json.dumps(manifest, indent=2, sort_keys=True))
+    precompress_assets()
+    return manifest
+
+def precompress_assets():
+    """Writes .gz (and, with brotli installed, .br) siblings for text assets.
+
+    A sibling is only rewritten when it is older than its source, and is
+    skipped entirely when compression does not make the file smaller.
+    """
+    for dirpath, _, filenames in os.walk(app.static_folder):
+        for filename in filenames:
+            if not filename.endswith(PRECOMPRESSED_EXTENSIONS):
+                continue
+            source = os.path.join(dirpath, filename)
+            source_mtime = os.stat(source).st_mtime_ns
+            data = None
+            for encoding, suffix in PRECOMPRESSED_ENCODINGS:
+                if encoding == 'br' and brotli is None:
+                    continue
+                target = source + suffix
+                try:
+                    if os.stat(target).st_mtime_ns >= source_mtime:
+                        continue
+                except FileNotFoundError:
+                    pass
+                if data is None:
+                    with open(source, 'rb') as f:
+                        data = f.read()
+                if encoding == 'br':
+                    compressed = brotli.compress(data, quality=11)
+                else:
+                    compressed = gzip.compress(data, compresslevel=9, mtime=0)
+                if len(compressed) < len(data):
+                    _write_atomic(target, compressed)
+
+@app.url_defaults
+def hashed_static_url(endpoint, values):
+    """Points url_for('static', filename=...) at the content-hashed copy."""
+    if endpoint == 'static':
+        hashed = _asset_manifest().get(values.get('filename'))
+        if hashed is not None:
+            values['filename'] = hashed
+
+@app.cli.command('build-assets')
+def build_assets_command():
+    """Writes content-hashed static assets and the asset manifest."""
+    for logical, hashed in build_assets().items():
+        print(f"{logical} -> {hashed}")
+
+# --- Responsive images ---
+# ``build_images`` resizes each source in RESPONSIVE_IMAGES to every width in
+# RESPONSIVE_WIDTHS, in JPEG plus WebP and AVIF where the installed Pillow can
+# write them. Output names embed a hash of the source, so an unchanged source
+# is never re-encoded. Variants are listed in the asset manifest under
+# '<source>@<width>.<ext>' keys for the template helpers below.
+RESPONSIVE_IMAGES = ('images/hero_bg.jpg',)
+RESPONSIVE_WIDTHS = (480, 768, 1280, 1920)
+# Preferred first; (extension, Pillow format, MIME type)
+RESPONSIVE_FORMATS = (('avif', 'AVIF', 'image/avif'),
+                      ('webp', 'WEBP', 'image/webp'),
+                      ('jpg', 'JPEG', 'image/jpeg'))
+
+def build_images():
+    """Writes the resized variants of RESPONSIVE_IMAGES; returns their manifest entries."""
+    try:
+        from PIL import Image
+    except ImportError:
+        app.logger.warning("Pillow not installed. Skipping responsive image variants.")
+        return {}
+    Image.init()
+    formats = [fmt for fmt in RESPONSIVE_FORMATS if fmt[1] in Image.SAVE]
+    manifest = {}
+    for filename in RESPONSIVE_IMAGES:
+        source = os.path.join(app.static_folder, filename)
+        try:
+            with open(source, 'rb') as f:
+                digest = hashlib.blake2b(f.read(), digest_size=16).hexdigest()[:10]
+        except FileNotFoundError:
+            continue
+        stem = os.path.splitext(filename)[0]
+        image = None
+        for width in RESPONSIVE_WIDTHS:
+            for ext, pil_format, _ in formats:
+                hashed = f'{stem}-{width}.{digest}.{ext}'
+                target = os.path.join(app.static_folder, hashed)
+                if not os.path.exists(target):
+                    if image is None:
+                        try:
+                            image = Image.open(source)
+                            image.load()
+                        except OSError as e:
+                            app.logger.warning("Cannot read %s: %s", source, e)
+                            break
+                    resized = image
+                    if image.width > width:
+                        resized = image.resize((width, round(image.height * width / image.width)),
+                                               Image.LANCZOS)
+                    buffer = io.BytesIO()
+                    resized.convert('RGB').save(buffer, pil_format, quality=80)
+                    _write_atomic(target, buffer.getvalue())
+                manifest[f'{filename}@{width}.{ext}'] = hashed
+    return manifest
+
+def _image_variants(filename, ext):
+    """Yields (url, width) for each built width of an image in one format."""
+    manifest = _asset_manifest()
+    for width in RESPONSIVE_WIDTHS:
+        key = f'{filename}@{width}.{ext}'
+        if key in manifest:
+            yield url_for('static', filename=key), width
+
+@app.template_global()
+def image_srcset(filename, ext='jpg'):
+    """Returns a srcset value listing every built width of an image."""
+    return ', '.join(f'{url} {width}w' for url, width in _image_variants(filename, ext))
+
+@app.template_global()
+def responsive_background(selector, filename, overlay=None):
+    """Returns a <style> block that gives selector a width-appropriate background.
+
+    Each breakpoint uses image-set() so the browser picks the first format it
+    supports, after a plain JPEG declaration for browsers without image-set().
+    Returns an empty string when no variants have been built.
+    """
+    by_width = {}
+    for ext, _, mime in RESPONSIVE_FORMATS:
+        for url, width in _image_variants(filename, ext):
+            by_width.setdefault(width, []).append((url, mime))
+    if not by_width:
+        return ''
+    prefix = f'{overlay}, ' if overlay else ''
+    rules = []
+    previous = None
+    for width in sorted(by_width):
+        candidates = by_width[width]
+        image_set = ', '.join(f'url("{url}") type("{mime}")' for url, mime in candidates)
+        declarations = (f'background-image: {prefix}url("{candidates[-1][0]}"); '
+                        f'background-image: {prefix}image-set({image_set});')
+        rule = f'{selector} {{ {declarations} }}'
+        if previous is not None:
+            rule = f'@media (min-width: {previous + 1}px) {{ {rule} }}'
+        rules.append(rule)
+        previous = width
+    return Markup('<style>\n' + '\n'.join(rules) + '\n</style>')
+
+# --- Minification and critical CSS ---
+# The hashed copies written by ``build_assets`` are minified. For each page in
+# CRITICAL_CSS_TEMPLATES the build also keeps just the style.css rules whose
+# selectors can match the navigation and the page's first <section>; the
+# page_stylesheets() helper inlines those and loads the full sheet async.
+CRITICAL_CSS_TEMPLATES = ('index.html', 'about.html', 'contact_success.html')
+_critical_css_cache = {}
+
+_CSS_STRING = r'"(?:[^"\\\n]|\\.)*"|\'(?:[^\'\\\n]|\\.)*\''
+# Strings and url() are copied verbatim; comments are dropped
+_CSS_TOKEN = re.compile(rf'(?P<keep>{_CSS_STRING}|url\(\s*(?:{_CSS_STRING}|[^)]*)\s*\))'
+                        r'|(?P<comment>/\*.*?\*/)', re.S | re.I)
+
+def _minify_css_code(css):
+    css = re.sub(r'\s+', ' ', css)
+    css = re.sub(r'\s*([{};,>])\s*', r'\1', css)
+    css = re.sub(r':\s+', ':', css)
+    return css.replace(';}', '}')
+
+def minify_css(css):
+    """Strips comments and insignificant whitespace from a stylesheet,
+    leaving quoted strings and url() values untouched."""
+    out, code, pos = [], [], 0
+    for match in _CSS_TOKEN.finditer(css):
+        code.append(css[pos:match.start()])
+        pos = match.end()
+        if match.group('keep'):
+            out.append(_minify_css_code(''.join(code)))
+            out.append(match.group())
+            code = []
+    code.append(css[pos:])
+    out.append(_minify_css_code(''.join(code)))
+    return ''.join(out).strip()
+
+_JS_TOKEN = re.compile(r'''
+    (?P<string>"(?:[^"\\\n]|\\.)*"|'(?:[^'\\\n]|\\.)*'|`(?:[^`\\]|\\.)*`)
+  | (?P<block>/\*.*?\*/)
+  | (?P<line>//[^\n]*)
+  | (?P<regex>/(?:[^/\\\n\[]|\\.|\[(?:[^\]\\\n]|\\.)*\])+/[a-z]*)
+''', re.S | re.X)
+# After these a slash divides; anywhere else it starts a regular expression
+_JS_OPERAND_END = re.compile(r'(?:[\w$)\]"\'`]|\+\+|--)\s*$')
+_JS_KEYWORD_END = re.compile(
+    r'(?<![\w$.])(?:return|typeof|case|do|else|in|of|new|delete|void|throw|instanceof)\s*$')
+
+def _minify_js_code(js):
+    # Trailing whitespace, indentation and blank lines
+    return re.sub(r'[ \t]*\n\s*', '\n', js)
+
+def minify_js(js):
+    """Drops comments, indentation and blank lines from a script.
+
+    Deliberately conservative: code is never joined across lines, so
+    automatic semicolon insertion behaves exactly as in the source. String,
+    template and regular expression literals are copied verbatim.
+    """
+    out, code, pos = [], [], 0
+    while True:
+        match = _JS_TOKEN.search(js, pos)
+        if match is None:
+            break
+        code.append(js[pos:match.start()])
+        pos = match.end()
+        kind = match.lastgroup
+        if kind == 'regex':
+            before = ''.join(out[-1:] + code)
+            if _JS_OPERAND_END.search(before) and not _JS_KEYWORD_END.search(before):
+                # A division: keep the slash and scan on from just after it
+                code.append('/')
+                pos = match.start() + 1
+                continue
+        if kind == 'block':
+            code.append('\n' if '\n' in match.group() else ' ')
+        elif kind != 'line':
+            out.append(_minify_js_code(''.join(code)))
+            out.append(match.group())
+            code = []
+    code.append(js[pos:])
+    out.append(_minify_js_code(''.join(code)))
+    return ''.join(out).strip()
+
+def _css_blocks(css):
+    """Splits minified CSS into top-level (prelude, body) pairs."""
+    blocks, depth, start, body_start = [], 0, 0, 0
+    for i, ch in enumerate(css):
+        if ch == '{':
+            if depth == 0:
+                prelude, body_start = css[start:i], i + 1
+            depth += 1
+        elif ch == '}':
+            depth -= 1
+            if depth == 0:
+                blocks.append((prelude.strip(), css[body_start:i]))
+                start = i + 1
+        elif ch == ';' and depth == 0:
+            # Statement at-rules such as @charset or @import
+            start = i + 1
+    return blocks
+
+_SIMPLE_SELECTOR = re.compile(r'([.#]?)(-?[_a-zA-Z][\w-]*)')
+
+def _selector_matches(selector, used):
+    """Returns True if every class, id and tag in a selector occurs in the page."""
+    selector = re.sub(r'\[[^\]]*\]|::?[\w-]+(\([^)]*\))?', '', selector)
+    return all(part in used for part in _SIMPLE_SELECTOR.findall(selector))
+
+def filter_css(css, used):
+    """Keeps the rules of minified CSS whose selectors match ``used``.
+
+    ``used`` holds ('.', class), ('#', id) and ('', tag) pairs. Font faces
+    and keyframes are dropped; @media/@supports blocks are filtered inside.
+    """
+    out = []
+    for prelude, body in _css_blocks(css):
+        if prelude.startswith(('@media', '@supports')):
+            inner = filter_css(body, used)
+            if inner:
+                out.append(f'{prelude}{{{inner}}}')
+        elif not prelude.startswith('@'):
+            selectors = [s for s in prelude.split(',') if _selector_matches(s, used)]
+            if selectors:
+                out.append(f"{','.join(selectors)}{{{body}}}")
+    return ''.join(out)
+
+def _used_selectors(html):
+    """Collects the classes, ids and tags that appear in template markup."""
+    used = {('', 'html'), ('', 'body')}
+    used.update(('', tag.lower()) for tag in re.findall(r'<([a-zA-Z][\w-]*)', html))
+    for value in re.findall(r'\bclass="([^"]*)"', html):
+        used.update(('.', name) for name in value.split() if '{' not in name)
+    used.update(('#', value) for value in re.findall(r'\bid="([^"]+)"', html))
+    return used
+
+def _above_the_fold(template_name):
+    """Returns the markup shown first on a page: base.html's navigation and
+    the page's first <section>."""
+    base = TEMPLATES['base.html']
+    html = base[:base.index('{% block content %}')]
+    page = TEMPLATES[template_name]
+    first_section = re.search(r'<section\b.*?</section>', page, re.S)
+    return html + (first_section.group(0) if first_section else page)
+
+def build_critical_css(css):
+    """Writes the critical subset of minified CSS for each page; returns manifest entries."""
+    manifest = {}
+    for template_name in CRITICAL_CSS_TEMPLATES:
+        critical = filter_css(css, _used_selectors(_above_the_fold(template_name)))
+        stem = os.path.splitext(template_name)[0]
+        manifest[f'critical/{template_name}'] = _write_hashed(f'css/critical/{stem}.css',
+                                                              critical.encode('utf-8'))
+    return manifest
+
+def _critical_css(template_name):
+    """Returns the inlinable critical CSS of a page, or None if not built."""
+    hashed = _asset_manifest().get(f'critical/{template_name}')
+    if hashed is None:
+        return None
+    css = _critical_css_cache.get(hashed)
+    if css is None:
+        with open(os.path.join(app.static_folder, hashed), encoding='utf-8') as f:
+            css = f.read()
+        _critical_css_cache[hashed] = css
+    return css
+
+@app.template_global()
+def page_stylesheets(template_name, filename='css/style.css'):
+    """Returns the tags that load a stylesheet for a page.
+
+    With critical CSS built, that is the inlined critical rules plus a
+    preload that applies the full sheet once it arrives (and a <noscript>
+    fallback); otherwise a plain render-blocking <link>.
+    """
+    href = escape(url_for('static', filename=filename))
+    critical = _critical_css(template_name)
+    if critical is None:
+        return Markup(f'<link rel="stylesheet" href="{href}">')
+    return Markup(
+        f'<style>{critical}</style>\n'
+        f'    <link rel="preload" href="{href}" as="style" '
+        f'onload="this.onload=null;this.rel=\'stylesheet\'">\n'
+        f'    <noscript><link rel="stylesheet" href="{href}"></noscript>')
+
+# --- Vendored front-end libraries ---
+# ``build_vendor`` serves Bootstrap and Font Awesome from our own origin,
+# reduced to what the templates use. It reads the unmodified upstream
+# distribution files from VENDOR_DIR (no network access needed):
+#
+#   vendor/bootstrap/dist/css/bootstrap.min.css
+#   vendor/bootstrap/dist/js/bootstrap.bundle.min.js
+#   vendor/fontawesome/css/all.min.css
+#   vendor/fontawesome/webfonts/fa-solid-900.woff2 (or .ttf)
+#
+# Bootstrap's CSS and Font Awesome's CSS keep only rules whose selectors match
+# the templates; the solid icon font is subset to the glyphs those rules use
+# when fontTools is installed. Bootstrap's JS bundle is copied as is. Until
+# the files are built, base.html falls back to the public CDNs.
+app.config.update(
+    VENDOR_DIR=os.path.join(app.root_path, 'vendor'),
+)
+
+# Classes that only appear at runtime: toggled by Bootstrap's JS, or built
+# from a status category in a template expression
+VENDOR_CLASS_SAFELIST = ('show', 'showing', 'collapsing', 'collapsed', 'fade', 'active',
+                         'alert-success', 'alert-danger', 'alert-warning')
+
+def _license_banner(css):
+    """Returns the leading /*! ... */ license comment of a stylesheet, if any."""
+    match = re.match(r'\s*(?:@charset[^;]*;)?\s*(/\*!.*?\*/)', css, re.S)
+    return match.group(1) + '\n' if match else ''
+
+def _subset_font(source, codepoints, flavor):
+    """Returns font bytes reduced to codepoints, or None without fontTools."""
+    try:
+        from fontTools import subset
+    except ImportError:
+        return None
+    options = subset.Options()
+    options.flavor = flavor
+    options.layout_features = ['*']
+    font = subset.load_font(source, options)
+    subsetter = subset.Subsetter(options)
+    subsetter.populate(unicodes=codepoints)
+    subsetter.subset(font)
+    buffer = io.BytesIO()
+    subset.save_font(font, buffer, options)
+    return buffer.getvalue()
+
+def _build_icon_font(fa_root, css):
+    """Writes the (subset) solid icon font; returns its hashed static path."""
+    codepoints = {int(cp, 16) for cp in re.findall(r'content:"\\([0-9a-f]{4,5})"', css)}
+    for ext, flavor in (('.woff2', 'woff2'), ('.ttf', None)):
+        source = os.path.join(fa_root, 'webfonts', 'fa-solid-900' + ext)
+        if not os.path.exists(source):
+            continue
+        if flavor == 'woff2' and brotli is None:
+            # fontTools needs brotli to read and write WOFF2
+            data = None
+        else:
+            data = _subset_font(source, codepoints, flavor)
+        if data is None:
+            app.logger.warning("fontTools/brotli not available; serving the full %s",
+                               os.path.basename(source))
+            with open(source, 'rb') as f:
+                data = f.read()
+        return _write_hashed('vendor/fa-solid-900' + (ext if flavor else '.ttf'), data)
+    return None
+
+def build_vendor():
+    """Builds the trimmed, self-hosted Bootstrap and Font Awesome; returns manifest entries."""
+    vendor_dir = app.config['VENDOR_DIR']
+    used = _used_selectors(''.join(TEMPLATES.values()))
+    used.update(('.', name) for name in VENDOR_CLASS_SAFELIST)
+    manifest = {}
+
+    bootstrap_css = os.path.join(vendor_dir, 'bootstrap', 'dist', 'css', 'bootstrap.min.css')
+    if os.path.exists(bootstrap_css):
+        with open(bootstrap_css, encoding='utf-8') as f:
+            css = f.read()
+        trimmed = _license_banner(css) + filter_css(minify_css(css), used)
+        manifest['vendor/bootstrap.css'] = _write_hashed('vendor/bootstrap.css',
+                                                         trimmed.encode('utf-8'))
+
+    bootstrap_js = os.path.join(vendor_dir, 'bootstrap', 'dist', 'js', 'bootstrap.bundle.min.js')
+    if os.path.exists(bootstrap_js):
+        with open(bootstrap_js, 'rb') as f:
+            manifest['vendor/bootstrap.bundle.js'] = _write_hashed('vendor/bootstrap.bundle.js',
+                                                                   f.read())
+
+    fa_root = os.path.join(vendor_dir, 'fontawesome')
+    fa_css = os.path.join(fa_root, 'css', 'all.min.css')
+    if os.path.exists(fa_css):
+        with open(fa_css, encoding='utf-8') as f:
+            css = f.read()
+        rules = []
+        font_faces = []
+        for prelude, body in _css_blocks(minify_css(css)):
+            if prelude == '@font-face':
+                # Only the solid face is used by the templates
+                if 'fa-solid-900' in body:
+                    font_faces.append(body)
+            else:
+                rules.append(filter_css(f'{prelude}{{{body}}}', used))
+        trimmed = ''.join(rules)
+        font = _build_icon_font(fa_root, trimmed)
+        if font is not None:
+            # Listed so it is served as immutable and exported by freeze
+            manifest['vendor/fa-solid-900' + os.path.splitext(font)[1]] = font
+            src = f'src:url({os.path.basename(font)})'
+            trimmed = ''.join('@font-face{%s}' % re.sub(r'src:[^;}]*', src, body)
+                              for body in font_faces) + trimmed
+        trimmed = _license_banner(css) + trimmed
+        manifest['vendor/fontawesome.css'] = _write_hashed('vendor/fontawesome.css',
+                                                           trimmed.encode('utf-8'))
+    return manifest
+
+@app.template_global()
+def has_asset(filename):
+    """Returns True if a logical static file has been built into the manifest."""
+    return filename in _asset_manifest()
+
+# --- Response compression ---
+
+def _compress(data, encoding, level):
+    """Compresses data with gzip or brotli; level is 'fast' or 'best'."""
+    if encoding == 'br':
+        return brotli.compress(data, quality=11 if level == 'best' else 5)
+    return gzip.compress(data, compresslevel=9 if level == 'best' else 6, mtime=0)
+
+def _add_vary(headers, field):
+    """Adds a field to the Vary header of a WSGI header list."""
+    vary = [v.strip() for v in headers.get('Vary', '').split(',') if v.strip()]
+    if field not in vary:
+        vary.append(field)
+    headers['Vary'] = ', '.join(vary)
+
+class CompressionMiddleware:
+    """Compresses HTML page responses with brotli or gzip.
+
+    Responses that carry an ETag (pages served from the page cache) are
+    compressed once at the highest level and kept per (path, encoding, ETag);
+    the cache is dropped whenever the template version changes. Each encoded
+    representation gets its own ETag, suffixed with the encoding, and
+    If-None-Match is mapped back to the identity ETag before the app sees it.
+    """
+
+    def __init__(self, wsgi_app, min_size=512):
+        self.wsgi_app = wsgi_app
+        self.min_size = min_size
+        self._cache = {}
+        self._cache_version = None
+
+    def _choose_encoding(self, environ):
+        accepted = parse_accept_header(environ.get('HTTP_ACCEPT_ENCODING', ''))
+        if brotli is not None and accepted['br']:
+            return 'br'
+        if accepted['gzip']:
+            return 'gzip'
+        return None
+
+    def __call__(self, environ, start_response):
+        encoding = None
+        if environ.get('REQUEST_METHOD') == 'GET':
+            encoding = self._choose_encoding(environ)
+        if encoding is None:
+            return self.wsgi_app(environ, start_response)
+
+        suffix = '-' + encoding + '"'
+        if_none_match = environ.get('HTTP_IF_NONE_MATCH', '')
+        if suffix in if_none_match:
+            environ['HTTP_IF_NONE_MATCH'] = if_none_match.replace(suffix, '"')
+
+        captured = []
+        def write(data):
+            raise RuntimeError('CompressionMiddleware does not support write()')
+        def capture(status, headers, exc_info=None):
+            captured[:] = [status, Headers(headers), exc_info]
+            return write
+
+        app_iter = self.wsgi_app(environ, capture)
+        status, headers, exc_info = captured
+        etag = headers.get('ETag')
+        is_html = (headers.get('Content-Type', '').startswith('text/html')
+                   and 'Content-Encoding' not in headers)
+
+        # A 304 carries no Content-Type; it answers an encoded ETag we rewrote
+        if status.startswith('304') and etag and suffix in if_none_match:
+            headers['ETag'] = etag[:-1] + suffix
+            _add_vary(headers, 'Accept-Encoding')
+            start_response(status, headers.to_wsgi_list(), exc_info)
+            return app_iter
+
+        if not is_html or not status.startswith('200'):
+            start_response(status, headers.to_wsgi_list(), exc_info)
+            return app_iter
+
+        _add_vary(headers, 'Accept-Encoding')
+
+        try:
+            body = b''.join(app_iter)
+        finally:
+            if hasattr(app_iter, 'close'):
+                app_iter.close()
+        if len(body) < self.min_size:
+            start_response(status, headers.to_wsgi_list(), exc_info)
+            return [body]
+
+        if etag:
+            version = _template_version()
+            if version != self._cache_version:
+                self._cache = {}
+                self._cache_version = version
+            key = (environ.get('PATH_INFO', ''), encoding, etag)
+            compressed = self._cache.get(key)
+            if compressed is None:
+                compressed = _compress(body, encoding, 'best')
+                self._cache[key] = compressed
+            headers['ETag'] = etag[:-1] + suffix
+        else:
+            compressed = _compress(body, encoding, 'fast')
+
+        headers['Content-Encoding'] = encoding
+        headers['Content-Length'] = str(len(compressed))
+        start_response(status, headers.to_wsgi_list(), exc_info)
+        return [compressed]
+
+app.wsgi_app = CompressionMiddleware(app.wsgi_app)
+
+# --- Reverse proxies ---
+# Behind nginx, Caddy or a load balancer the peer address is the proxy's, so
+# rate limiting would put every visitor in one bucket. Set PROXY_COUNT to the
+# number of proxies in front of the app that append to X-Forwarded-For (1 for
+# the configurations written by ``freeze``); the client address, scheme and
+# host are then taken from the X-Forwarded-* headers, as werkzeug's ProxyFix
+# does. Leave it at 0 when clients connect directly, or they can spoof it.
+app.config.update(
+    PROXY_COUNT=0,
+)
+
+class TrustedProxyMiddleware:
+    """Applies ProxyFix for the configured number of trusted proxies."""
+
+    def __init__(self, wsgi_app, config):
+        self.wsgi_app = wsgi_app
+        self.config = config
+        self._fixed = {}
+
+    def __call__(self, environ, start_response):
+        hops = self.config['PROXY_COUNT']
+        if not hops:
+            return self.wsgi_app(environ, start_response)
+        fixed = self._fixed.get(hops)
+        if fixed is None:
+            fixed = self._fixed[hops] = ProxyFix(self.wsgi_app, x_for=hops, x_proto=hops,
+                                                 x_host=hops)
+        return fixed(environ, start_response)
+
+def forwarded_address(remote_addr, forwarded_for):
+    """Returns the client address as ProxyFix would, given the peer address and
+    X-Forwarded-For header of a request."""
+    hops = app.config['PROXY_COUNT']
+    if hops and forwarded_for:
+        values = [value.strip() for value in forwarded_for.split(',')]
+        if len(values) >= hops:
+            return values[-hops]
+    return remote_addr
+
+app.wsgi_app = TrustedProxyMiddleware(app.wsgi_app, app.config)
+
+# --- Contact submission queue ---
+# contact() only validates and enqueues; a background thread group-commits
+# submissions into SQLite. CONTACT_BACKPRESSURE decides what happens when the
+# queue is full: 'reject' turns the submission away, 'drop' discards it while
+# still thanking the sender, and 'block' waits up to CONTACT_BLOCK_TIMEOUT
+# seconds for room before rejecting. While the database cannot be opened the
+# writer retries every CONTACT_RETRY_INTERVAL seconds; a batch that fails to
+# commit is kept and retried with backoff on a fresh connection. Either way
+# new submissions are turned away as busy until a write works again.
+app.config.update(
+    CONTACT_DB_PATH=os.path.join(app.root_path, 'contact.sqlite3'),
+    CONTACT_QUEUE_SIZE=10000,
+    CONTACT_BATCH_SIZE=100,
+    CONTACT_FLUSH_INTERVAL=0.5,
+    CONTACT_BACKPRESSURE='reject',
+    CONTACT_BLOCK_TIMEOUT=0.05,
+    CONTACT_RETRY_INTERVAL=5.0,
+)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS submissions (
+    id INTEGER PRIMARY KEY,
+    received_at REAL NOT NULL,
+    name TEXT NOT NULL,
+    email TEXT NOT NULL,
+    message TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS outbox (
+    id INTEGER PRIMARY KEY,
+    created_at REAL NOT NULL,
+    next_attempt REAL NOT NULL,
+    sender TEXT NOT NULL,
+    recipients TEXT NOT NULL,
+    payload BLOB NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    last_error TEXT,
+    claimed_by TEXT,
+    claimed_at REAL,
+    sent_at REAL
+);
+CREATE INDEX IF NOT EXISTS outbox_due ON outbox (status, next_attempt);
+"""
+
+def open_database(path):
+    """Opens the contact database in WAL mode and creates its tables."""
+    conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+    conn.execute('PRAGMA journal_mode=WAL')
+    conn.execute('PRAGMA synchronous=NORMAL')
+    conn.executescript(_SCHEMA)
+    return conn
+
+class SubmissionQueue(BatchWorker):
+    """Bounded in-process queue drained into SQLite by a background thread."""
+
+    thread_name = 'contact-writer'
+    queue_size_key = 'CONTACT_QUEUE_SIZE'
+    batch_size_key = 'CONTACT_BATCH_SIZE'
+    flush_interval_key = 'CONTACT_FLUSH_INTERVAL'
+
+    def __init__(self, app):
+        super().__init__(app)
+        self.healthy = True
+
+    def _reset(self):
+        self.healthy = True
+
+    def submit(self, name, email, message):
+        """Enqueues a validated submission; returns False if it was turned away."""
+        self._ensure_started()
+        if not self.healthy:
+            return False
+        item = (time.time(), name, email, message)
+        policy = self.app.config['CONTACT_BACKPRESSURE']
+        try:
+            if policy == 'block':
+                self._queue.put(item, timeout=self.app.config['CONTACT_BLOCK_TIMEOUT'])
+            else:
+                self._queue.put_nowait(item)
+        except queue.Full:
+            return policy == 'drop'
+        return True
+
+    async def submit_async(self, name, email, message):
+        """Like submit(), but waits for room on the event loop instead of blocking."""
+        self._ensure_started()
+        if not self.healthy:
+            return False
+        item = (time.time(), name, email, message)
+        policy = self.app.config['CONTACT_BACKPRESSURE']
+        wait = self.app.config['CONTACT_BLOCK_TIMEOUT'] if policy == 'block' else 0
+        deadline = time.monotonic() + wait
+        while True:
+            try:
+                self._queue.put_nowait(item)
+                return True
+            except queue.Full:
+                if time.monotonic() >= deadline:
+                    return policy == 'drop'
+            await asyncio.sleep(0.005)
+
+    def _connect(self):
+        """Opens the database, retrying until it works; submissions are
+        turned away as busy meanwhile and queued ones wait."""
+        config = self.app.config
+        while True:
+            try:
+                return open_database(config['CONTACT_DB_PATH'])
+            except (sqlite3.Error, OSError) as e:
+                if self.healthy:
+                    app.logger.error("Cannot open contact database %s: %s",
+                                     config['CONTACT_DB_PATH'], e)
+                self.healthy = False
+                time.sleep(config['CONTACT_RETRY_INTERVAL'])
+
+    def _recovered(self):
+        if not self.healthy:
+            app.logger.info("Contact database %s is available again",
+                            self.app.config['CONTACT_DB_PATH'])
+        self.healthy = True
+
+    def _run(self):
+        conn = self._connect()
+        self._recovered()
+        for batch in self._batches():
+            conn = self._store(conn, batch)
+        conn.close()
+
+    def _store(self, conn, batch):
+        """Writes a batch, retrying with backoff on a fresh connection until
+        it commits; returns the connection to carry on with."""
+        config = self.app.config
+        attempt = 0
+        while True:
+            try:
+                self._write_batch(conn, batch)
+                break
+            except sqlite3.Error as e:
+                if self.healthy:
+                    app.logger.error("Failed to store %d contact submissions, retrying: %s",
+                                     len(batch), e)
+                self.healthy = False
+            time.sleep(min(0.1 * 2 ** attempt, config['CONTACT_RETRY_INTERVAL']))
+            attempt += 1
+            conn.close()
+            conn = self._connect()
+        self._recovered()
+        return conn
+
+    def _write_batch(self, conn, batch):
+        notify = mail_outbox.enabled
+        with conn:
+            conn.executemany(
+                'INSERT INTO submissions (received_at, name, email, message) '
+                'VALUES (?, ?, ?, ?)', batch)
+            if notify:
+                conn.executemany(
+                    'INSERT INTO outbox (created_at, next_attempt, sender, recipients, '
+                    'payload) VALUES (?, ?, ?, ?, ?)',
+                    [mail_outbox.compose(*item) for item in batch])
+        if notify:
+            mail_outbox.wake()
+        for received_at, name, email, message in batch:
+            app.logger.info("New contact form submission", extra={'fields': {
+                'received_at': received_at, 'name': name, 'email': email,
+                'contact_message': message}})
+
+submissions = SubmissionQueue(app)
+atexit.register(submissions.close)
+
+# --- Outbound mail ---
+# Each stored submission also gets a notification row in the outbox table,
+# written in the same transaction, so nothing is lost across a restart. A
+# background thread claims due rows and delivers them over a small pool of
+# reused SMTP connections, several messages per connection. Failed messages
+# are retried with exponential backoff until MAIL_MAX_ATTEMPTS is reached.
+# Each process starts its sender on its first request (or ASGI startup), so
+# rows left pending by a previous run are picked up without waiting for a new
+# submission. Delivery is disabled while MAIL_SERVER is unset; for local
+# testing point it at a stand-in server, e.g.
+# ``python -m aiosmtpd -n -l localhost:8025``.
+app.config.update(
+    MAIL_SERVER=None,
+    MAIL_PORT=25,
+    MAIL_USE_TLS=False,
+    MAIL_USE_SSL=False,
+    MAIL_USERNAME=None,
+    MAIL_PASSWORD=None,
+    MAIL_TIMEOUT=10,
+    MAIL_SENDER='noreply@localhost',
+    MAIL_RECIPIENTS=[],
+    MAIL_POOL_SIZE=2,
+    MAIL_MESSAGES_PER_CONNECTION=20,
+    MAIL_MAX_ATTEMPTS=8,
+    MAIL_RETRY_BASE=2.0,
+    MAIL_RETRY_MAX=3600.0,
+    MAIL_POLL_INTERVAL=5.0,
+    MAIL_CLAIM_TIMEOUT=300.0,
+)
+
+class SMTPConnectionPool:
+    """Keeps up to ``size`` idle SMTP connections open for reuse."""
+
+    def __init__(self, config):
+        self.config = config
+        self._idle = queue.LifoQueue(maxsize=config['MAIL_POOL_SIZE'])
+
+    def _connect(self):
+        config = self.config
+        cls = smtplib.SMTP_SSL if config['MAIL_USE_SSL'] else smtplib.SMTP
+        conn = cls(config['MAIL_SERVER'], config['MAIL_PORT'],
+                   timeout=config['MAIL_TIMEOUT'])
+        if config['MAIL_USE_TLS']:
+            conn.starttls()
+        if config['MAIL_USERNAME']:
+            conn.login(config['MAIL_USERNAME'], config['MAIL_PASSWORD'])
+        return conn
+
+    def acquire(self):
+        """Returns a live connection, reusing an idle one when possible."""
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                return self._connect()
+            try:
+                conn.noop()
+                return conn
+            except (smtplib.SMTPException, OSError):
+                self.discard(conn)
+
+    def release(self, conn):
+        """Returns a healthy connection to the pool, closing it if the pool is full."""
+        try:
+            self._idle.put_nowait(conn)
+        except queue.Full:
+            self.discard(conn)
+
+    def discard(self, conn):
+        try:
+            conn.quit()
+        except (smtplib.SMTPException, OSError):
+            conn.close()
+
+    def close(self):
+        while True:
+            try:
+                self.discard(self._idle.get_nowait())
+            except queue.Empty:
+                return
+
+class MailOutbox:
+    """Durable outbox of contact notifications with a background sender."""
+
+    def __init__(self, app):
+        self.app = app
+        self._lock = threading.Lock()
+        self._pid = None
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+
+    @property
+    def enabled(self):
+        return bool(self.app.config['MAIL_SERVER'] and self.app.config['MAIL_RECIPIENTS'])
+
+    def compose(self, received_at, name, email, message):
+        """Builds the outbox row for one submission."""
+        config = self.app.config
+        msg = EmailMessage()
+        msg['Subject'] = f'New contact form submission from {name}'
+        msg['From'] = config['MAIL_SENDER']
+        msg['To'] = ', '.join(config['MAIL_RECIPIENTS'])
+        msg['Reply-To'] = email
+        msg.set_content(f"Name: {name}\nEmail: {email}\n\n{message}\n")
+        return (received_at, received_at, config['MAIL_SENDER'],
+                '\n'.join(config['MAIL_RECIPIENTS']), msg.as_bytes())
+
+    def start(self):
+        """Starts the sender in this process if it is not running yet."""
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid != os.getpid():
+                self._wake = threading.Event()
+                self._stop = threading.Event()
+                self._thread = threading.Thread(target=self._run, name='mail-sender',
+                                                daemon=True)
+                self._thread.start()
+                self._pid = os.getpid()
+
+    def wake(self):
+        """Starts the sender in this process if needed and nudges it."""
+        self.start()
+        self._wake.set()
+
+    def close(self, timeout=5):
+        if self._pid != os.getpid():
+            return
+        self._pid = None
+        self._stop.set()
+        self._wake.set()
+        self._thread.join(timeout)
+
+    def _connect(self, stop):
+        """Opens the database, retrying every CONTACT_RETRY_INTERVAL seconds;
+        returns None if the sender is stopped first."""
+        config = self.app.config
+        failing = False
+        while not stop.is_set():
+            try:
+                conn = open_database(config['CONTACT_DB_PATH'])
+            except (sqlite3.Error, OSError) as e:
+                if not failing:
+                    app.logger.error("Mail sender cannot open contact database %s: %s",
+                                     config['CONTACT_DB_PATH'], e)
+                failing = True
+                stop.wait(config['CONTACT_RETRY_INTERVAL'])
+                continue
+            if failing:
+                app.logger.info("Mail sender reconnected to contact database %s",
+                                config['CONTACT_DB_PATH'])
+            return conn
+        return None
+
+    def _run(self):
+        config = self.app.config
+        stop, wake = self._stop, self._wake
+        pool = SMTPConnectionPool(config)
+        conn = None
+        try:
+            with concurrent.futures.ThreadPoolExecutor(config['MAIL_POOL_SIZE']) as executor:
+                while not stop.is_set():
+                    if conn is None:
+                        conn = self._connect(stop)
+                        if conn is None:
+                            break
+                    try:
+                        rows = self._claim(conn)
+                        if rows:
+                            per_conn = config['MAIL_MESSAGES_PER_CONNECTION']
+                            chunks = [rows[i:i + per_conn]
+                                      for i in range(0, len(rows), per_conn)]
+                            for results in executor.map(lambda c: self._deliver(pool, c),
+                                                        chunks):
+                                self._record(conn, results)
+                            continue
+                    except sqlite3.Error as e:
+                        # Claimed rows are picked up again after MAIL_CLAIM_TIMEOUT
+                        app.logger.error("Mail sender database error: %s", e)
+                        conn.close()
+                        conn = None
+                        stop.wait(config['CONTACT_RETRY_INTERVAL'])
+                        continue
+                    wake.wait(config['MAIL_POLL_INTERVAL'])
+                    wake.clear()
+        finally:
+            pool.close()
+            if conn is not None:
+                conn.close()
+            # Let start()/wake() run a new sender if this one died
+            with self._lock:
+                if self._thread is threading.current_thread():
+                    self._pid = None
+
+    def _claim(self, conn):
+        """Marks a batch of due messages as in flight and returns them."""
+        config = self.app.config
+        now = time.time()
+        token = f'{os.getpid()}-{uuid.uuid4().hex}'
+        limit = config['MAIL_POOL_SIZE'] * config['MAIL_MESSAGES_PER_CONNECTION']
+        with conn:
+            conn.execute(
+                "UPDATE outbox SET status = 'sending', claimed_by = ?, claimed_at = ? "
+                "WHERE id IN (SELECT id FROM outbox WHERE "
+                "(status = 'pending' AND next_attempt <= ?) OR "
+                "(status = 'sending' AND claimed_at < ?) ORDER BY id LIMIT ?)",
+                (token, now, now, now - config['MAIL_CLAIM_TIMEOUT'], limit))
+            return conn.execute(
+                'SELECT id, attempts, sender, recipients, payload FROM outbox '
+                'WHERE claimed_by = ? ORDER BY id', (token,)).fetchall()
+
+    def _deliver(self, pool, rows):
+        """Sends rows over one pooled connection; returns (id, attempts, error) tuples."""
+        results = []
+        try:
+            smtp = pool.acquire()
+        except (smtplib.SMTPException, OSError) as e:
+            return [(row[0], row[1], str(e)) for row in rows]
+        healthy = True
+        for row_id, attempts, sender, recipients, payload in rows:
+            if not healthy:
+                results.append((row_id, attempts, 'connection lost'))
+                continue
+            try:
+                smtp.sendmail(sender, recipients.split('\n'), payload)
+                results.append((row_id, attempts, None))
+            except (smtplib.SMTPServerDisconnected, OSError) as e:
+                healthy = False
+                results.append((row_id, attempts, str(e)))
+            except smtplib.SMTPException as e:
+                results.append((row_id, attempts, str(e)))
+        if healthy:
+            pool.release(smtp)
+        else:
+            smtp.close()
+        return results
+
+    def _record(self, conn, results):
+        config = self.app.config
+        now = time.time()
+        with conn:
+            for row_id, attempts, error in results:
+                if error is None:
+                    conn.execute("UPDATE outbox SET status = 'sent', sent_at = ?, "
+                                 "claimed_by = NULL WHERE id = ?", (now, row_id))
+                    continue
+                attempts += 1
+                delay = min(config['MAIL_RETRY_BASE'] * 2 ** attempts, config['MAIL_RETRY_MAX'])
+                status = 'failed' if attempts >= config['MAIL_MAX_ATTEMPTS'] else 'pending'
+                conn.execute(
+                    'UPDATE outbox SET status = ?, attempts = ?, next_attempt = ?, '
+                    'last_error = ?, claimed_by = NULL WHERE id = ?',
+                    (status, attempts, now + delay * random.uniform(0.5, 1.0), error, row_id))
+                if status == 'failed':
+                    app.logger.error("Giving up on contact notification %d: %s", row_id, error,
+                                     extra={'fields': {'outbox_id': row_id,
+                                                       'attempts': attempts}})
+
+mail_outbox = MailOutbox(app)
+atexit.register(mail_outbox.close)
+
+def internal_client():
+    """Returns a test client for the app's own requests (warming caches,
+    freezing pages). Those run in the gunicorn master before it forks, so
+    they must not start the mail sender there."""
+    client = app.test_client()
+    client.environ_base['site.internal'] = True
+    return client
+
+@app.before_request
+def start_mail_sender():
+    """Starts delivering whatever is due in the outbox, including rows from earlier runs."""
+    if mail_outbox.enabled and not request.environ.get('site.internal'):
+        mail_outbox.start()
+
+# --- Rate limiting ---
+# POST /contact is limited per client with a token bucket keyed by address,
+# aggregated to RATELIMIT_IPV4_PREFIX / RATELIMIT_IPV6_PREFIX sized subnets.
+# Bucket state lives in a fixed-size table, so memory stays bounded however
+# many clients show up: the 'memory' backend keeps a per-process table with
+# LRU eviction, the 'shared' backend a set-associative table in shared memory
+# that every worker forked from the same parent enforces together.
+app.config.update(
+    RATELIMIT_ENABLED=True,
+    RATELIMIT_BURST=5,
+    RATELIMIT_PER_SECOND=5 / 60,
+    RATELIMIT_TABLE_SIZE=65536,
+    RATELIMIT_IPV4_PREFIX=32,
+    RATELIMIT_IPV6_PREFIX=64,
+    RATELIMIT_BACKEND='memory',
+)
+
+RATE_LIMITED_ENDPOINTS = {'contact', 'api_contact'}
+
+def _take_token(tokens, stamp, now, rate, burst):
+    """Refills a bucket and takes one token; returns (tokens, seconds to wait)."""
+    tokens = min(burst, tokens + (now - stamp) * rate)
+    if tokens >= 1:
+        return tokens - 1, 0.0
+    return tokens, (1 - tokens) / rate
+
+class TokenBucketTable:
+    """Per-process bucket table backed by two float arrays with LRU eviction."""
+
+    def __init__(self, size):
+        self._tokens = array('d', bytes(8 * size))
+        self._stamps = array('d', bytes(8 * size))
+        self._slots = OrderedDict()
+        self._free = list(range(size - 1, -1, -1))
+        self._lock = threading.Lock()
+
+    def hit(self, key, rate, burst):
+        now = time.monotonic()
+        with self._lock:
+            slot = self._slots.get(key)
+            if slot is None:
+                slot = self._free.pop() if self._free else self._slots.popitem(last=False)[1]
+                self._slots[key] = slot
+                tokens, stamp = float(burst), now
+            else:
+                self._slots.move_to_end(key)
+                tokens, stamp = self._tokens[slot], self._stamps[slot]
+            tokens, wait = _take_token(tokens, stamp, now, rate, burst)
+            self._tokens[slot] = tokens
+            self._stamps[slot] = now
+        return wait
+
+class SharedTokenBucketTable:
+    """Bucket table in an anonymous shared mapping, inherited across fork().
+
+    Keys are reduced to a 64-bit hash and placed in one of ``size // WAYS``
+    sets; a full set evicts its least recently used entry.
+    """
+
+    WAYS = 4
+    _RECORD = struct.Struct('<Qdd')
+
+    def __init__(self, size):
+        self._sets = max(1, size // self.WAYS)
+        self._map = mmap.mmap(-1, self._sets * self.WAYS * self._RECORD.size)
+        self._lock = multiprocessing.Lock()
+
+    def hit(self, key, rate, burst):
+        now = time.monotonic()
+        key_hash = int.from_bytes(hashlib.blake2b(key.encode(), digest_size=8).digest(),
+                                  'little') or 1
+        base = (key_hash % self._sets) * self.WAYS
+        record = self._RECORD
+        with self._lock:
+            victim, victim_stamp = base, None
+            for slot in range(base, base + self.WAYS):
+                stored, tokens, stamp = record.unpack_from(self._map, slot * record.size)
+                if stored == key_hash:
+                    victim = None
+                    break
+                if stored == 0:
+                    victim_stamp = float('-inf')
+                    victim = slot
+                elif victim_stamp is None or stamp < victim_stamp:
+                    victim, victim_stamp = slot, stamp
+            if victim is not None:
+                slot, tokens, stamp = victim, float(burst), now
+            tokens, wait = _take_token(tokens, stamp, now, rate, burst)
+            record.pack_into(self._map, slot * record.size, key_hash, tokens, now)
+        return wait
+
+class RateLimiter:
+    """Chooses and lazily builds the bucket table configured for the app."""
+
+    def __init__(self, app):
+        self.app = app
+        self._table = None
+
+    def prepare(self):
+        """Builds the table now; call before forking workers for the shared backend."""
+        if self._table is None:
+            config = self.app.config
+            if config['RATELIMIT_BACKEND'] == 'shared':
+                self._table = SharedTokenBucketTable(config['RATELIMIT_TABLE_SIZE'])
+            else:
+                self._table = TokenBucketTable(config['RATELIMIT_TABLE_SIZE'])
+        return self._table
+
+    def hit(self, key):
+        """Takes a token for key; returns 0 if allowed, else seconds until retry."""
+        config = self.app.config
+        return self.prepare().hit(key, config['RATELIMIT_PER_SECOND'],
+                                  config['RATELIMIT_BURST'])
+
+rate_limiter = RateLimiter(app)
+
+def address_key(address):
+    """Returns the subnet of a client address used as its rate-limit key."""
+    try:
+        ip = ipaddress.ip_address(address)
+    except ValueError:
+        return address
+    prefix = app.config['RATELIMIT_IPV4_PREFIX' if ip.version == 4 else 'RATELIMIT_IPV6_PREFIX']
+    return str(ipaddress.ip_network((ip, prefix), strict=False))
+
+def client_key():
+    """Returns the rate-limit key of the requesting client.
+
+    request.remote_addr is already the forwarded client address when
+    PROXY_COUNT is set.
+    """
+    return address_key(request.remote_addr or '')
+
+@app.before_request
+def limit_submission_rate():
+    """Answers 429 before the form is parsed when a client is over its limit."""
+    if request.endpoint not in RATE_LIMITED_ENDPOINTS or not app.config['RATELIMIT_ENABLED']:
+        return None
+    retry_after = rate_limiter.hit(client_key())
+    if not retry_after:
+        return None
+    if request.endpoint == 'api_contact':
+        response = jsonify(status='rate_limited', category='warning',
+                           message='Too many submissions. Please try again later.')
+        response.status_code = 429
+    else:
+        response = app.response_class('Too many submissions. Please try again later.\n',
+                                      status=429, mimetype='text/plain')
+    response.headers['Retry-After'] = str(math.ceil(retry_after))
+    return response
+
+# --- Duplicate filter ---
+# Repeated name/email/message triples are dropped before they reach the
+# submission queue. Seen submissions are remembered in a two-generation Bloom
+# filter: generations rotate every DEDUP_WINDOW seconds (or when one fills to
+# DEDUP_CAPACITY), so a submission is remembered for one to two windows in a
+# fixed amount of memory. A submission is only remembered once it has been
+# queued, so one turned away as busy can be retried. A DEDUP_AUDIT_RATE
+# sample of hits is checked against an exact record of the last
+# DEDUP_AUDIT_SIZE remembered submissions. While that record holds everything
+# the filter remembers, a hit missing from it is a false positive and is let
+# through; otherwise the hit cannot be verified, is counted as such, and is
+# dropped like any other repeat.
+app.config.update(
+    DEDUP_ENABLED=True,
+    DEDUP_WINDOW=3600,
+    DEDUP_CAPACITY=100000,
+    DEDUP_ERROR_RATE=0.001,
+    DEDUP_AUDIT_RATE=0.01,
+    DEDUP_AUDIT_SIZE=4096,
+)
+
+class RollingBloomFilter:
+    """Bloom filter over 16-byte digests that forgets entries older than two windows."""
+
+    def __init__(self, capacity, error_rate, window):
+        self.capacity = capacity
+        self.window = window
+        self.bits = max(8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.bits / capacity * math.log(2)))
+        self._current = bytearray((self.bits + 7) // 8)
+        self._previous = bytearray((self.bits + 7) // 8)
+        self._count = 0
+        self._previous_count = 0
+        self._rotated_at = time.monotonic()
+
+    def _positions(self, digest):
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        return [(h1 + i * h2) % self.bits for i in range(self.hashes)]
+
+    def _rotate_if_due(self):
+        now = time.monotonic()
+        if self._count >= self.capacity or now - self._rotated_at >= self.window:
+            if now - self._rotated_at >= 2 * self.window:
+                # Idle for two windows: the current generation has expired too
+                self._previous = bytearray(len(self._current))
+                self._previous_count = 0
+            else:
+                self._previous = self._current
+                self._previous_count = self._count
+            self._current = bytearray(len(self._previous))
+            self._count = 0
+            self._rotated_at = now
+
+    def __len__(self):
+        """Number of digests currently remembered, across both generations."""
+        return self._count + self._previous_count
+
+    def __contains__(self, digest):
+        self._rotate_if_due()
+        current, previous = self._current, self._previous
+        in_current = in_previous = True
+        for pos in self._positions(digest):
+            byte, mask = pos >> 3, 1 << (pos & 7)
+            in_current = in_current and bool(current[byte] & mask)
+            in_previous = in_previous and bool(previous[byte] & mask)
+        return in_current or in_previous
+
+    def add(self, digest):
+        """Records a digest; returns True if it was (probably) already present."""
+        self._rotate_if_due()
+        current, previous = self._current, self._previous
+        in_current = in_previous = True
+        for pos in self._positions(digest):
+            byte, mask = pos >> 3, 1 << (pos & 7)
+            if not current[byte] & mask:
+                in_current = False
+                current[byte] |= mask
+            if not previous[byte] & mask:
+                in_previous = False
+        if not in_current:
+            self._count += 1
+        return in_current or in_previous
+
+class DuplicateFilter:
+    """Drops repeated contact submissions and counts what it decided."""
+
+    def __init__(self, app):
+        self.app = app
+        self._lock = threading.Lock()
+        self._bloom = None
+        self._recent = OrderedDict()
+        self.counters = {'accepted': 0, 'dropped': 0, 'audited': 0, 'false_positives': 0,
+                         'unverified': 0}
+
+    @staticmethod
+    def digest(name, email, message):
+        """Hashes the whitespace- and case-normalized fields of a submission."""
+        fields = (' '.join(value.split()).casefold() for value in (name, email, message))
+        return hashlib.blake2b('\0'.join(fields).encode('utf-8'), digest_size=16).digest()
+
+    def _filter(self):
+        if self._bloom is None:
+            config = self.app.config
+            self._bloom = RollingBloomFilter(config['DEDUP_CAPACITY'],
+                                             config['DEDUP_ERROR_RATE'],
+                                             config['DEDUP_WINDOW'])
+        return self._bloom
+
+    def is_duplicate(self, name, email, message):
+        """Returns True if the submission should be dropped as a repeat.
+
+        Does not remember the submission; call remember() once it is queued.
+        """
+        digest = self.digest(name, email, message)
+        with self._lock:
+            bloom = self._filter()
+            seen = digest in bloom
+            if seen and random.random() < self.app.config['DEDUP_AUDIT_RATE']:
+                self.counters['audited'] += 1
+                if digest not in self._recent:
+                    if len(bloom) <= len(self._recent):
+                        self.counters['false_positives'] += 1
+                        seen = False
+                    else:
+                        self.counters['unverified'] += 1
+            if seen:
+                self.counters['dropped'] += 1
+        return seen
+
+    def remember(self, name, email, message):
+        """Records a queued submission so repeats of it are dropped."""
+        digest = self.digest(name, email, message)
+        with self._lock:
+            self._filter().add(digest)
+            self.counters['accepted'] += 1
+            self._recent[digest] = None
+            self._recent.move_to_end(digest)
+            if len(self._recent) > self.app.config['DEDUP_AUDIT_SIZE']:
+                self._recent.popitem(last=False)
+
+    def stats(self):
+        """Returns a snapshot of the filter's counters."""
+        with self._lock:
+            return dict(self.counters)
+
+duplicate_filter = DuplicateFilter(app)
+
+# --- Metrics ---
+# Requests are timed per endpoint between Flask's request_started and
+# request_finished signals, which bracket the before_request hooks, the view
+# and saving the session; the (uncompressed) response size is recorded with
+# them. Template rendering is timed through the template signals, so only
+# page cache misses show up there, and the session interface times opening
+# and saving the cookie. Every thread records into its own storage, so the
+# request path never takes a lock; /metrics adds the threads up on scrape.
+# The storage of a thread that has exited is folded into a per-process
+# retired total, so thread-per-connection servers keep one per live thread.
+# When METRICS_DIR is set (``serve`` sets it) each worker also writes its
+# totals to <pid>-<token>.json there every METRICS_FLUSH_INTERVAL seconds and
+# when it exits, and a scrape of any worker merges the files of all of them.
+# When a worker exits the master folds its file into exited.json, so recycled
+# workers neither pile up files nor take their counts with them.
+app.config.update(
+    METRICS_ENABLED=True,
+    METRICS_DIR=None,
+    METRICS_FLUSH_INTERVAL=5.0,
+)
+
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576)
+
+EXITED_SNAPSHOT = 'exited.json'
+
+# name: (help, buckets, label); counters have no buckets
+METRICS = {
+    'http_request_duration_seconds':
+        ('Time to handle a request, by endpoint.', LATENCY_BUCKETS, 'endpoint'),
+    'http_response_size_bytes':
+        ('Uncompressed response body size, by endpoint.', SIZE_BUCKETS, 'endpoint'),
+    'flask_template_render_seconds':
+        ('Time to render a template, by template.', LATENCY_BUCKETS, 'template'),
+    'flask_session_seconds':
+        ('Time to open or save the session cookie.', LATENCY_BUCKETS, 'operation'),
+    'flask_session_cookie_bytes_total':
+        ('Bytes of session cookies set on responses.', None, None),
+    'contact_duplicate_filter_total':
+        ('Contact submissions by duplicate filter decision.', None, 'decision'),
+}
+
+def _merge_series(totals, snapshot):
+    """Adds a {name: {label: values}} snapshot into totals."""
+    for name, series in snapshot.items():
+        merged = totals.setdefault(name, {})
+        for label, values in series.items():
+            current = merged.get(label)
+            if current is None:
+                merged[label] = list(values)
+            else:
+                for i, value in enumerate(values):
+                    current[i] += value
+
+def _format_number(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+class Metrics:
+    """Per-thread histograms and counters, merged across threads and workers."""
+
+    def __init__(self, app):
+        self.app = app
+        self._local = threading.local()
+        # Guards the thread storages and the retired total, touched once per thread
+        self._lock = threading.Lock()
+        self._storages = []
+        self._retired = {}
+        self._pid = None
+        self._snapshot_name = None
+        self._stop = threading.Event()
+
+    def _storage(self):
+        local = self._local
+        pid = os.getpid()
+        if getattr(local, 'pid', None) != pid:
+            local.storage, local.pid = {}, pid
+            with self._lock:
+                if self._pid != pid:
+                    # Forked (or first use): the parent's figures are not ours
+                    self._pid = pid
+                    self._storages = []
+                    self._retired = {}
+                    # Unique per process, so a reused pid never overwrites a snapshot
+                    self._snapshot_name = f'{pid}-{uuid.uuid4().hex[:8]}.json'
+                    if self.app.config['METRICS_DIR']:
+                        self._stop = threading.Event()
+                        threading.Thread(target=self._run, args=(self._stop,),
+                                         name='metrics-flush', daemon=True).start()
+                self._retire_exited()
+                self._storages.append((threading.current_thread(), local.storage))
+        return local.storage
+
+    def _retire_exited(self):
+        """Folds the storage of exited threads into the retired total; lock held."""
+        live = []
+        for thread, storage in self._storages:
+            if thread.is_alive():
+                live.append((thread, storage))
+                continue
+            for key, values in storage.items():
+                current = self._retired.get(key)
+                if current is None:
+                    self._retired[key] = list(values)
+                else:
+                    for i, value in enumerate(values):
+                        current[i] += value
+        self._storages = live
+
+    def observe(self, name, label, value):
+        """Records value in the histogram name."""
+        buckets = METRICS[name][1]
+        storage = self._storage()
+        values = storage.get((name, label))
+        if values is None:
+            # One count per bucket, then +Inf, then the sum
+            values = storage[(name, label)] = [0] * (len(buckets) + 1) + [0.0]
+        values[bisect.bisect_left(buckets, value)] += 1
+        values[-1] += value
+
+    def inc(self, name, label='', amount=1):
+        """Adds amount to the counter name."""
+        storage = self._storage()
+        values = storage.get((name, label))
+        if values is None:
+            values = storage[(name, label)] = [0]
+        values[0] += amount
+
+    def collect(self):
+        """Returns this process's totals as {name: {label: values}}."""
+        totals = {}
+        storages = []
+        with self._lock:
+            if self._pid == os.getpid():
+                self._retire_exited()
+                storages.append({key: list(values) for key, values in self._retired.items()})
+                storages.extend(storage for _, storage in self._storages)
+        for storage in storages:
+            snapshot = {}
+            for (name, label), values in storage.copy().items():
+                snapshot.setdefault(name, {})[label] = values
+            _merge_series(totals, snapshot)
+        totals['contact_duplicate_filter_total'] = {
+            decision: [count] for decision, count in duplicate_filter.stats().items()}
+        return totals
+
+    def flush(self):
+        """Writes this process's totals to METRICS_DIR, if configured."""
+        directory = self.app.config['METRICS_DIR']
+        if directory and self._pid == os.getpid():
+            _write_atomic(os.path.join(directory, self._snapshot_name),
+                          json.dumps(self.collect()).encode('utf-8'))
+
+    def _run(self, stop):
+        while not stop.wait(self.app.config['METRICS_FLUSH_INTERVAL']):
+            try:
+                self.flush()
+            except OSError as e:
+                app.logger.warning("Could not write metrics snapshot: %s", e)
+
+    def close(self):
+        """Stops the flush thread and writes a final snapshot."""
+        if self._pid == os.getpid():
+            self._stop.set()
+            self.flush()
+
+    @staticmethod
+    def _load(path):
+        try:
+            with open(path, encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def fold_exited(self, pid):
+        """Moves an exited worker's snapshot into exited.json; run in the master."""
+        directory = self.app.config['METRICS_DIR']
+        if not directory:
+            return
+        path = os.path.join(directory, EXITED_SNAPSHOT)
+        exited = self._load(path) or {'folded': [], 'totals': {}}
+        try:
+            present = set(os.listdir(directory))
+        except FileNotFoundError:
+            return
+        # Names stay listed until their file is gone, so a scrape never counts twice
+        exited['folded'] = [name for name in exited['folded'] if name in present]
+        names = [name for name in present
+                 if name.startswith(f'{pid}-') and name.endswith('.json')]
+        for name in names:
+            snapshot = self._load(os.path.join(directory, name))
+            if snapshot is not None:
+                _merge_series(exited['totals'], snapshot)
+            exited['folded'].append(name)
+        if not names:
+            return
+        _write_atomic(path, json.dumps(exited).encode('utf-8'))
+        for name in names:
+            os.unlink(os.path.join(directory, name))
+
+    def merged(self):
+        """Returns the totals of this process plus every other worker's snapshot."""
+        totals = self.collect()
+        directory = self.app.config['METRICS_DIR']
+        if directory:
+            exited = self._load(os.path.join(directory, EXITED_SNAPSHOT))
+            skip = {EXITED_SNAPSHOT, self._snapshot_name}
+            if exited is not None:
+                _merge_series(totals, exited['totals'])
+                skip.update(exited['folded'])
+            for entry in os.scandir(directory):
+                if not entry.name.endswith('.json') or entry.name in skip:
+                    continue
+                snapshot = self._load(entry.path)
+                if snapshot is not None:
+                    _merge_series(totals, snapshot)
+        return totals
+
+    def render(self):
+        """Returns all metrics in the Prometheus text exposition format."""
+        totals = self.merged()
+        lines = []
+        for name, (help_text, buckets, label_name) in METRICS.items():
+            series = totals.get(name, {})
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f"# TYPE {name} {'histogram' if buckets else 'counter'}")
+            for label in sorted(series):
+                values = series[label]
+                labels = f'{label_name}="{label}"' if label_name else ''
+                if buckets is None:
+                    lines.append(f"{name}{{{labels}}} {_format_number(values[0])}"
+                                 if labels else f'{name} {_format_number(values[0])}')
+                    continue
+                prefix = labels + ',' if labels else ''
+                cumulative = 0
+                for bound, count in zip(buckets + ('+Inf',), values):
+                    cumulative += count
+                    lines.append(f'{name}_bucket{{{prefix}le="{bound}"}} {cumulative}')
+                lines.append(f'{name}_sum{{{labels}}} {_format_number(values[-1])}')
+                lines.append(f'{name}_count{{{labels}}} {cumulative}')
+        return '\n'.join(lines) + '\n'
+
+metrics = Metrics(app)
+atexit.register(metrics.close)
+
+class TimedSessionInterface(SecureCookieSessionInterface):
+    """Cookie sessions that record how long opening and saving them takes."""
+
+    def open_session(self, app, request):
+        started = time.perf_counter()
+        try:
+            return super().open_session(app, request)
+        finally:
+            if app.config['METRICS_ENABLED']:
+                metrics.observe('flask_session_seconds', 'open',
+                                time.perf_counter() - started)
+
+    def save_session(self, app, session, response):
+        started = time.perf_counter()
+        super().save_session(app, session, response)
+        if not app.config['METRICS_ENABLED']:
+            return
+        metrics.observe('flask_session_seconds', 'save', time.perf_counter() - started)
+        prefix = self.get_cookie_name(app) + '='
+        size = sum(len(cookie) for cookie in response.headers.getlist('Set-Cookie')
+                   if cookie.startswith(prefix))
+        if size:
+            metrics.inc('flask_session_cookie_bytes_total', amount=size)
+
+app.session_interface = TimedSessionInterface()
+
+def _start_request_timer(sender, **extra):
+    g._request_started = time.perf_counter()
+
+def _record_request(sender, response, **extra):
+    started = g.get('_request_started')
+    if started is None or not app.config['METRICS_ENABLED']:
+        return
+    endpoint = request.endpoint or 'unmatched'
+    metrics.observe('http_request_duration_seconds', endpoint, time.perf_counter() - started)
+    if response.content_length is not None:
+        metrics.observe('http_response_size_bytes', endpoint, response.content_length)
+
+def _start_template_timer(sender, template, context, **extra):
+    g.setdefault('_metrics_templates', []).append(time.perf_counter())
+
+def _record_template(sender, template, context, **extra):
+    timers = g.get('_metrics_templates')
+    if timers and app.config['METRICS_ENABLED']:
+        metrics.observe('flask_template_render_seconds', template.name or 'string',
+                        time.perf_counter() - timers.pop())
+
+request_started.connect(_start_request_timer, app)
+request_finished.connect(_record_request, app)
+before_render_template.connect(_start_template_timer, app)
+template_rendered.connect(_record_template, app)
+
+@app.route('/metrics')
+def metrics_endpoint():
+    """Serves request, template and session metrics for Prometheus."""
+    if not app.config['METRICS_ENABLED']:
+        abort(404)
+    return app.response_class(metrics.render(),
+                              content_type='text/plain; version=0.0.4; charset=utf-8')
+
+# --- Access log ---
+# One JSON line per request on the '<app>.access' logger, written through the
+# same queue as app.logger. Requests are sampled at ACCESS_LOG_SAMPLE_RATE,
+# which each line records so counts can be scaled back up; server errors and
+# requests slower than ACCESS_LOG_SLOW_SECONDS are always logged.
+app.config.update(
+    ACCESS_LOG_ENABLED=True,
+    ACCESS_LOG_SAMPLE_RATE=0.1,
+    ACCESS_LOG_SLOW_SECONDS=1.0,
+)
+
+access_log = app.logger.getChild('access')
+
+def _log_request(sender, response, **extra):
+    config = app.config
+    started = g.get('_request_started')
+    if not config['ACCESS_LOG_ENABLED'] or started is None:
+        return
+    duration = time.perf_counter() - started
+    rate = config['ACCESS_LOG_SAMPLE_RATE']
+    if response.status_code >= 500 or duration >= config['ACCESS_LOG_SLOW_SECONDS']:
+        rate = 1.0
+    elif random.random() >= rate:
+        return
+    access_log.info('%s %s %d', request.method, request.path, response.status_code,
+                    extra={'fields': {
+                        'method': request.method,
+                        'path': request.path,
+                        'endpoint': request.endpoint,
+                        'status': response.status_code,
+                        'duration_ms': round(duration * 1000, 3),
+                        'bytes': response.content_length,
+                        'remote_addr': request.remote_addr,
+                        'sample_rate': rate,
+                    }})
+
+request_finished.connect(_log_request, app)
 
 # --- Routes ---
 
 @app.route('/')
 def index():
     """Renders the homepage with hero, features, and contact form."""
-    return render_template('index.html')
+    return render_page('index.html', request_status())
 
 @app.route('/about')
 def about():
     """Renders the about page."""
-    return render_template('about.html')
+    return render_page('about.html')
+
+def check_submission(name, email, message):
+    """Validates a submission and filters repeats.
+
+    Returns a STATUS_MESSAGES code to answer with, or None if the submission
+    should be stored.
+    """
+    # Basic server-side validation
+    if not name or not email or not message:
+        return 'missing'
+    
+    if '@' not in email or '.' not in email:
+        return 'invalid_email'
+
+    # Repeats are dropped quietly; the sender sees the usual confirmation
+    if app.config['DEDUP_ENABLED'] and duplicate_filter.is_duplicate(name, email, message):
+        return 'accepted'
+
+    return None
+
+def process_submission(name, email, message):
+    """Validates and enqueues a contact submission; returns a STATUS_MESSAGES code."""
+    status = check_submission(name, email, message)
+    if status is not None:
+        return status
+
+    # Storage happens on the submissions worker thread
+    if not submissions.submit(name, email, message):
+        return 'busy'
+
+    if app.config['DEDUP_ENABLED']:
+        duplicate_filter.remember(name, email, message)
+    return 'accepted'
 
 @app.route('/contact', methods=['POST'])
 def contact():
     """Handles contact form submissions."""
     if request.method == 'POST':
-        name = request.form.get('name')
-        email = request.form.get('email')
-        message = request.form.get('message')
-
-        # Basic server-side validation
-        if not name or not email or not message:
-            flash('All fields are required!', 'danger')
-            return redirect(url_for('index'))
-        
-        if '@' not in email or '.' not in email:
-            flash('Please enter a valid email address.', 'danger')
-            return redirect(url_for('index'))
-
-        # In a real application, you would process this data:
-        # - Send an email
-        # - Save to a database
-        # - Integrate with a CRM
-        print(f"New Contact Form Submission:")
-        print(f"Name: {name}")
-        print(f"Email: {email}")
-        print(f"Message: {message}")
-        print("-" * 30)
-
-        flash('Thank you for your message! We will get back to you soon.', 'success')
-        return redirect(url_for('contact_success'))
+        status = process_submission(request.form.get('name'),
+                                    request.form.get('email'),
+                                    request.form.get('message'))
+        if status == 'accepted':
+            return redirect(url_for('contact_success'))
+        return redirect_with_status('index', status)
     
     # If someone tries to access /contact directly via GET, redirect to home
     return redirect(url_for('index'))
 
+API_STATUS_CODES = {'accepted': 202, 'missing': 400, 'invalid_email': 400, 'busy': 503}
+
+@app.route('/api/contact', methods=['POST'])
+def api_contact():
+    """Accepts a contact submission as JSON or form data and answers with JSON.
+
+    Used by script.js to submit the form in place, without the redirect and
+    page render of the form flow.
+    """
+    data = request.get_json(silent=True) if request.is_json else request.form
+    if not hasattr(data, 'get'):
+        data = {}
+    fields = [data.get(key) for key in ('name', 'email', 'message')]
+    status = process_submission(*(value if isinstance(value, str) else None
+                                  for value in fields))
+    message, category = STATUS_MESSAGES[status]
+    response = jsonify(status=status, category=category, message=message)
+    response.status_code = API_STATUS_CODES[status]
+    if status == 'busy':
+        response.headers['Retry-After'] = '5'
+    return response
+
 @app.route('/contact-success')
 def contact_success():
     """Renders a success page after contact form submission."""
-    return render_template('contact_success.html')
+    return render_page('contact_success.html')
 
-# --- Main execution ---
-if __name__ == '__main__':
-    # Create static directories if they don't exist
-    os.makedirs('static/css', exist_ok=True)
-    os.makedirs('static/js', exist_ok=True)
-    os.makedirs('static/images', exist_ok=True)
-    os.makedirs('templates', exist_ok=True)
-
-    # Placeholder for static/css/style.css
-    with open('static/css/style.css', 'w') as f:
-        f.write("""
+# --- ASGI mode ---
+# ``asgi_app`` serves the same routes from an event loop, e.g.
+# ``uvicorn index:asgi_app``. Contact submissions (form and API) are handled
+# natively: the body is awaited from slow clients and the submission handed
+# to the storage queue without occupying a thread, and mail is sent from the
+# outbox in the background as in WSGI mode. Every other request is passed to
+# the WSGI app on asgiref's thread pool; those are cache hits and finish fast.
+ASGI_MAX_BODY = 64 * 1024
+
+class ContactASGIApp:
+    """ASGI application with async contact handlers in front of the WSGI app."""
+
+    def __init__(self, flask_app):
+        self.flask_app = flask_app
+        self._wsgi = None
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self._lifespan(receive, send)
+            return
+        path = scope.get('path', '')
+        # The path includes root_path when the app is mounted under a prefix
+        root_path = scope.get('root_path', '')
+        if root_path and (path == root_path or path.startswith(root_path + '/')):
+            path = path[len(root_path):]
+        if scope['type'] == 'http' and scope['method'] == 'POST' and path in ('/contact',
+                                                                                '/api/contact'):
+            started = time.perf_counter()
+            await self._contact(scope, receive, send, api=path == '/api/contact')
+            if self.flask_app.config['METRICS_ENABLED']:
+                metrics.observe('http_request_duration_seconds',
+                                'api_contact' if path == '/api/contact' else 'contact',
+                                time.perf_counter() - started)
+            return
+        if self._wsgi is None:
+            from asgiref.wsgi import WsgiToAsgi
+            self._wsgi = WsgiToAsgi(self.flask_app)
+        await self._wsgi(scope, receive, send)
+
+    async def _lifespan(self, receive, send):
+        while True:
+            event = await receive()
+            if event['type'] == 'lifespan.startup':
+                if mail_outbox.enabled:
+                    mail_outbox.start()
+                await send({'type': 'lifespan.startup.complete'})
+            elif event['type'] == 'lifespan.shutdown':
+                await asyncio.to_thread(submissions.close)
+                await asyncio.to_thread(mail_outbox.close)
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    async def _respond(self, send, status, headers, body=b''):
+        headers = [(k.encode('latin-1'), v.encode('latin-1')) for k, v in headers]
+        headers.append((b'content-length', str(len(body)).encode()))
+        await send({'type': 'http.response.start', 'status': status, 'headers': headers})
+        await send({'type': 'http.response.body', 'body': body})
+
+    async def _respond_status(self, send, scope, api, status, extra_headers=()):
+        if api:
+            message, category = STATUS_MESSAGES[status]
+            body = json.dumps({'status': status, 'category': category,
+                               'message': message}).encode('utf-8')
+            await self._respond(send, API_STATUS_CODES[status],
+                                [('content-type', 'application/json'), *extra_headers], body)
+            return
+        adapter = self.flask_app.url_map.bind('', script_name=scope.get('root_path') or '/')
+        if status == 'accepted':
+            location = adapter.build('contact_success')
+        else:
+            location = adapter.build('index', {'s': _status_serializer().dumps(status)})
+        await self._respond(send, 302, [('location', location)])
+
+    async def _contact(self, scope, receive, send, api):
+        config = self.flask_app.config
+        request_headers = {k.decode('latin-1').lower(): v.decode('latin-1')
+                           for k, v in scope.get('headers', [])}
+        if config['RATELIMIT_ENABLED']:
+            client = scope.get('client') or ('', 0)
+            address = forwarded_address(client[0], request_headers.get('x-forwarded-for'))
+            retry_after = rate_limiter.hit(address_key(address))
+            if retry_after:
+                response_headers = [('retry-after', str(math.ceil(retry_after)))]
+                if api:
+                    body = json.dumps({'status': 'rate_limited', 'category': 'warning',
+                                       'message': 'Too many submissions. Please try again later.'})
+                    response_headers.append(('content-type', 'application/json'))
+                else:
+                    body = 'Too many submissions. Please try again later.\n'
+                    response_headers.append(('content-type', 'text/plain; charset=utf-8'))
+                await self._respond(send, 429, response_headers, body.encode('utf-8'))
+                return
+
+        chunks, size = [], 0
+        while True:
+            event = await receive()
+            if event['type'] == 'http.disconnect':
+                return
+            chunk = event.get('body', b'')
+            size += len(chunk)
+            if size > ASGI_MAX_BODY:
+                await self._respond(send, 413, [('content-type', 'text/plain')],
+                                    b'Request body too large.\n')
+                return
+            chunks.append(chunk)
+            if not event.get('more_body', False):
+                break
+        body = b''.join(chunks)
+
+        content_type = request_headers.get('content-type', '')
+        data = {}
+        if content_type.startswith('application/json'):
+            try:
+                data = json.loads(body)
+            except ValueError:
+                data = {}
+        else:
+            environ = {'REQUEST_METHOD': 'POST', 'CONTENT_TYPE': content_type,
+                       'CONTENT_LENGTH': str(len(body)), 'wsgi.input': io.BytesIO(body)}
+            data = parse_form_data(environ)[1]
+        if not hasattr(data, 'get'):
+            data = {}
+        fields = [data.get(key) for key in ('name', 'email', 'message')]
+        name, email, message = (value if isinstance(value, str) else None for value in fields)
+
+        status = check_submission(name, email, message)
+        if status is None:
+            stored = await submissions.submit_async(name, email, message)
+            status = 'accepted' if stored else 'busy'
+            if stored and config['DEDUP_ENABLED']:
+                duplicate_filter.remember(name, email, message)
+        extra_headers = [('retry-after', '5')] if api and status == 'busy' else []
+        await self._respond_status(send, scope, api, status, extra_headers)
+
+asgi_app = ContactASGIApp(app)
+
+# --- Site sources ---
+# The stylesheet, script and templates ship inside this module. Templates are
+# served straight from TEMPLATES; the static files are written out by
+# ``generate_site`` (``python index.py generate`` or ``flask generate``).
+# Serving never writes to disk other than Jinja's bytecode cache.
+
+STYLE_CSS = """
 /* Custom styles for AI Startup Landing Page */
 body {
     font-family: 'Segoe UI', Roboto, 'Helvetica Neue', Arial, sans-serif;
@@ -288,11 +2697,9 @@ textarea.form-control {
         font-size: 1.3rem;
     }
 }
-""")
+"""
 
-    # Placeholder for static/js/script.js
-    with open('static/js/script.js', 'w') as f:
-        f.write("""
+SCRIPT_JS = """
 // Custom JavaScript for AI Startup Landing Page
 // (Currently empty, but ready for future enhancements)
 
@@ -307,28 +2714,53 @@ document.addEventListener('DOMContentLoaded', function() {
             });
         });
     });
-});
-""")
-
-    # Placeholder for static/images/hero_bg.jpg (replace with a real image)
-    # For demonstration, we'll create a dummy file. In a real app, you'd place an actual image here.
-    try:
-        from PIL import Image
-        img = Image.new('RGB', (1920, 1080), color = 'grey')
-        img.save('static/images/hero_bg.jpg')
-    except ImportError:
-        print("Pillow not installed. Cannot create dummy image. Please place a 'hero_bg.jpg' in static/images manually.")
-        with open('static/images/hero_bg.jpg', 'w') as f:
-            f.write("Dummy image content - replace with actual image.")
 
-    # Placeholder for static/favicon.ico
-    # For demonstration, we'll create a dummy file. In a real app, you'd place an actual favicon here.
-    with open('static/favicon.ico', 'w') as f:
-        f.write("Dummy favicon content - replace with actual .ico file.")
+    // Submit the contact form in place through the JSON API. Without
+    // JavaScript (or fetch) the form posts and redirects as before.
+    const form = document.getElementById('contact-form');
+    const statusBox = document.getElementById('contact-status');
+    if (!form || !statusBox || !window.fetch) {
+        return;
+    }
+    function showStatus(message, category) {
+        const alert = document.createElement('div');
+        alert.className = 'alert alert-' + category + ' alert-dismissible fade show';
+        alert.setAttribute('role', 'alert');
+        alert.textContent = message;
+        const close = document.createElement('button');
+        close.type = 'button';
+        close.className = 'btn-close';
+        close.setAttribute('data-bs-dismiss', 'alert');
+        close.setAttribute('aria-label', 'Close');
+        alert.appendChild(close);
+        statusBox.replaceChildren(alert);
+    }
+    form.addEventListener('submit', function (e) {
+        e.preventDefault();
+        const button = form.querySelector('button[type="submit"]');
+        button.disabled = true;
+        fetch(form.dataset.api, {
+            method: 'POST',
+            body: new FormData(form),
+            headers: { 'Accept': 'application/json' }
+        })
+            .then(response => response.json())
+            .then(result => {
+                showStatus(result.message, result.category);
+                if (result.status === 'accepted') {
+                    form.reset();
+                }
+            })
+            .catch(() => form.submit())
+            .finally(() => {
+                button.disabled = false;
+            });
+    });
+});
+"""
 
-    # base.html template
-    with open('templates/base.html', 'w') as f:
-        f.write("""
+TEMPLATES = {
+    'base.html': """
 <!DOCTYPE html>
 <html lang="en">
 <head>
@@ -340,11 +2772,24 @@ document.addEventListener('DOMContentLoaded', function() {
     <title>AI Innovate - Intelligent Solutions for the Future</title>
     <link rel="icon" href="{{ url_for('static', filename='favicon.ico') }}" type="image/x-icon">
     <!-- Bootstrap CSS -->
+    {% if has_asset('vendor/bootstrap.css') %}
+    <link rel="stylesheet" href="{{ url_for('static', filename='vendor/bootstrap.css') }}">
+    {% else %}
     <link href="https://cdn.jsdelivr.net/npm/bootstrap@5.3.3/dist/css/bootstrap.min.css" rel="stylesheet" integrity="sha384-QWTKZyjpPEjISv5WaRU9OFeRpok6YctnYmDr5pNlyT2bRjXh0JMhjY6hW+ALEwIH" crossorigin="anonymous">
-    <!-- Font Awesome for icons -->
-    <link rel="stylesheet" href="https://cdnjs.cloudflare.com/ajax/libs/font-awesome/6.5.2/css/all.min.css" integrity="sha512-SnH5WK+bZxgPHs44uWIX+LLJAJ9/2PkPKZ5QiAj6Ta86w+fsb2TkcmfRyVX3pBnMFcV7oQPJkl9QevSCWr3W6A==" crossorigin="anonymous" referrerpolicy="no-referrer" />
+    {% endif %}
+    <!-- Font Awesome for icons (not needed for first paint, so loaded async) -->
+    {% if has_asset('vendor/fontawesome.css') %}
+    <link rel="preload" href="{{ url_for('static', filename='vendor/fontawesome.css') }}" as="style" onload="this.onload=null;this.rel='stylesheet'">
+    <noscript><link rel="stylesheet" href="{{ url_for('static', filename='vendor/fontawesome.css') }}"></noscript>
+    {% else %}
+    <link rel="preload" href="https://cdnjs.cloudflare.com/ajax/libs/font-awesome/6.5.2/css/all.min.css" as="style" onload="this.onload=null;this.rel='stylesheet'" integrity="sha512-SnH5WK+bZxgPHs44uWIX+LLJAJ9/2PkPKZ5QiAj6Ta86w+fsb2TkcmfRyVX3pBnMFcV7oQPJkl9QevSCWr3W6A==" crossorigin="anonymous" referrerpolicy="no-referrer" />
+    <noscript><link rel="stylesheet" href="https://cdnjs.cloudflare.com/ajax/libs/font-awesome/6.5.2/css/all.min.css" integrity="sha512-SnH5WK+bZxgPHs44uWIX+LLJAJ9/2PkPKZ5QiAj6Ta86w+fsb2TkcmfRyVX3pBnMFcV7oQPJkl9QevSCWr3W6A==" crossorigin="anonymous" referrerpolicy="no-referrer" /></noscript>
+    {% endif %}
     <!-- Custom CSS -->
+    {% block stylesheets %}
     <link rel="stylesheet" href="{{ url_for('static', filename='css/style.css') }}">
+    {% endblock %}
+    {% block head %}{% endblock %}
 </head>
 <body>
     <nav class="navbar navbar-expand-lg navbar-dark fixed-top">
@@ -383,18 +2828,28 @@ document.addEventListener('DOMContentLoaded', function() {
     </footer>
 
     <!-- Bootstrap JS Bundle with Popper -->
+    {% if has_asset('vendor/bootstrap.bundle.js') %}
+    <script src="{{ url_for('static', filename='vendor/bootstrap.bundle.js') }}"></script>
+    {% else %}
     <script src="https://cdn.jsdelivr.net/npm/bootstrap@5.3.3/dist/js/bootstrap.bundle.min.js" integrity="sha384-YvpcrYf0tY3lHB60NNkmXc5s9fDVZLESaAA55NDzOxhy9GkcIdslK1eN7N6jIeHz" crossorigin="anonymous"></script>
+    {% endif %}
     <!-- Custom JS -->
     <script src="{{ url_for('static', filename='js/script.js') }}"></script>
 </body>
 </html>
-""")
+""",
 
-    # index.html template
-    with open('templates/index.html', 'w') as f:
-        f.write("""
+    'index.html': """
 {% extends "base.html" %}
 
+{% block stylesheets %}
+    {{ page_stylesheets('index.html') }}
+{% endblock %}
+
+{% block head %}
+    {{ responsive_background('.hero-section', 'images/hero_bg.jpg', 'linear-gradient(rgba(0, 0, 0, 0.7), rgba(0, 0, 0, 0.7))') }}
+{% endblock %}
+
 {% block content %}
     <!-- Hero Section -->
     <section class="hero-section">
@@ -466,17 +2921,14 @@ document.addEventListener('DOMContentLoaded', function() {
             <h2 class="text-center mb-5">Get in Touch</h2>
             <div class="row justify-content-center">
                 <div class="col-lg-8">
-                    {% with messages = get_flashed_messages(with_categories=true) %}
-                        {% if messages %}
-                            {% for category, message in messages %}
-                                <div class="alert alert-{{ category }} alert-dismissible fade show" role="alert">
-                                    {{ message }}
-                                    <button type="button" class="btn-close" data-bs-dismiss="alert" aria-label="Close"></button>
-                                </div>
-                            {% endfor %}
-                        {% endif %}
-                    {% endwith %}
-                    <form action="{{ url_for('contact') }}" method="POST">
+                    <div id="contact-status" aria-live="polite"></div>
+                    {% for category, message in status_messages %}
+                        <div class="alert alert-{{ category }} alert-dismissible fade show" role="alert">
+                            {{ message }}
+                            <button type="button" class="btn-close" data-bs-dismiss="alert" aria-label="Close"></button>
+                        </div>
+                    {% endfor %}
+                    <form id="contact-form" action="{{ url_for('contact') }}" method="POST" data-api="{{ url_for('api_contact') }}">
                         <div class="mb-3">
                             <label for="name" class="form-label">Name</label>
                             <input type="text" class="form-control" id="name" name="name" required>
@@ -498,13 +2950,15 @@ document.addEventListener('DOMContentLoaded', function() {
         </div>
     </section>
 {% endblock %}
-""")
+""",
 
-    # about.html template
-    with open('templates/about.html', 'w') as f:
-        f.write("""
+    'about.html': """
 {% extends "base.html" %}
 
+{% block stylesheets %}
+    {{ page_stylesheets('about.html') }}
+{% endblock %}
+
 {% block content %}
     <section class="about-section py-5">
         <div class="container mt-5">
@@ -529,13 +2983,15 @@ document.addEventListener('DOMContentLoaded', function() {
         </div>
     </section>
 {% endblock %}
-""")
+""",
 
-    # contact_success.html template
-    with open('templates/contact_success.html', 'w') as f:
-        f.write("""
+    'contact_success.html': """
 {% extends "base.html" %}
 
+{% block stylesheets %}
+    {{ page_stylesheets('contact_success.html') }}
+{% endblock %}
+
 {% block content %}
     <section class="contact-success-section py-5">
         <div class="container mt-5">
@@ -550,7 +3006,316 @@ document.addEventListener('DOMContentLoaded', function() {
         </div>
     </section>
 {% endblock %}
-""")
+""",
+}
+
+# --- Template loading ---
+# Jinja loads the templates from memory, so there is nothing to stat and
+# auto-reload is off (the dev server's reloader restarts on module changes
+# anyway). Compiled templates go to a FileSystemBytecodeCache shared by all
+# processes on the host, so new and recycled workers skip compilation. If the
+# directory cannot be created or written (a read-only install), templates are
+# compiled in memory instead.
+app.config.update(
+    JINJA_BYTECODE_CACHE_DIR=os.path.join(app.root_path, '.jinja_cache'),
+)
+
+def configure_templates():
+    """Points Jinja at TEMPLATES and the shared bytecode cache."""
+    app.jinja_loader = DictLoader(TEMPLATES)
+    app.jinja_env.auto_reload = False
+    cache_dir = app.config['JINJA_BYTECODE_CACHE_DIR']
+    if not cache_dir:
+        return
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        if not os.access(cache_dir, os.W_OK):
+            raise PermissionError(f"{cache_dir} is not writable")
+    except OSError as e:
+        app.logger.warning("Not caching template bytecode: %s", e)
+        return
+    app.jinja_env.bytecode_cache = FileSystemBytecodeCache(cache_dir)
+
+configure_templates()
+
+STATIC_FILES = {
+    'css/style.css': STYLE_CSS,
+    'js/script.js': SCRIPT_JS,
+    # Placeholder for static/favicon.ico
+    # For demonstration, we'll create a dummy file. In a real app, you'd place an actual favicon here.
+    'favicon.ico': "Dummy favicon content - replace with actual .ico file.",
+}
+
+HERO_IMAGE = 'images/hero_bg.jpg'
+
+def _generate_hero_image(path):
+    """Creates the placeholder hero image unless one already exists."""
+    if os.path.exists(path):
+        return False
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    # Placeholder for static/images/hero_bg.jpg (replace with a real image)
+    # For demonstration, we'll create a dummy file. In a real app, you'd place an actual image here.
+    try:
+        from PIL import Image
+        img = Image.new('RGB', (1920, 1080), color = 'grey')
+        buffer = io.BytesIO()
+        img.save(buffer, 'JPEG')
+        _write_atomic(path, buffer.getvalue())
+    except ImportError:
+        app.logger.warning("Pillow not installed. Cannot create dummy image. Please place a 'hero_bg.jpg' in static/images manually.")
+        _write_atomic(path, b"Dummy image content - replace with actual image.")
+    return True
+
+def generate_site():
+    """Writes the static files, then rebuilds the hashed assets.
+
+    Safe to run repeatedly and from several processes at once: files are only
+    replaced (atomically) when their content changed, and the hero image is
+    only rendered when missing. Returns the paths that were written.
+    """
+    written = []
+    for name, source in STATIC_FILES.items():
+        path = os.path.join(app.static_folder, name)
+        if _write_if_changed(path, source):
+            written.append(path)
+    hero_path = os.path.join(app.static_folder, HERO_IMAGE)
+    if _generate_hero_image(hero_path):
+        written.append(hero_path)
+    build_assets()
+    return written
+
+@app.cli.command('generate')
+def generate_command():
+    """Writes changed static files and rebuilds assets."""
+    for path in generate_site():
+        print(f"wrote {path}")
+
+# --- Static export ---
+# ``freeze_site`` renders the cacheable pages (without any status message) to
+# HTML files, copies the built static files next to them and writes ready-made
+# nginx and Caddy configurations. The web server then answers every GET from
+# disk and only proxies the contact endpoints, and index requests carrying a
+# status token (?s=...), to the app.
+FROZEN_PAGES = (('/', 'index.html'),
+                ('/about', 'about/index.html'),
+                ('/contact-success', 'contact-success/index.html'))
+DYNAMIC_ROUTES = ('/contact', '/api/contact')
+
+_NGINX_TEMPLATE = """\
+# Generated by 'flask freeze'. Include this inside a server block, and run
+# the app with PROXY_COUNT=1 so it reads the client address from these.
+root {root};
+
+proxy_set_header Host $host;
+proxy_set_header X-Forwarded-For $proxy_add_x_forwarded_for;
+proxy_set_header X-Forwarded-Proto $scheme;
+proxy_set_header X-Forwarded-Host $host;
+
+location = / {{
+    if ($arg_s) {{
+        proxy_pass http://{upstream};
+    }}
+    gzip_static on;
+    try_files /index.html =404;
+}}
+{dynamic}
+location ~ "\\.[0-9a-f]{{10}}\\.[a-z0-9]+$" {{
+    gzip_static on;
+    add_header Cache-Control "public, max-age=31536000, immutable";
+}}
+
+location / {{
+    gzip_static on;
+    try_files $uri $uri/index.html =404;
+}}
+"""
+
+_CADDY_TEMPLATE = """\
+# Generated by 'flask freeze'. reverse_proxy passes Host and sets
+# X-Forwarded-For/-Proto/-Host; run the app with PROXY_COUNT=1. If Caddy itself
+# sits behind a CDN or load balancer, list it under the global 'servers {{
+# trusted_proxies static ... }}' option and raise PROXY_COUNT to match.
+{{$SITE_ADDRESS:localhost}} {{
+    root * {root}
+
+    @dynamic path {paths}
+    reverse_proxy @dynamic {upstream}
+
+    @status {{
+        path /
+        query s=*
+    }}
+    reverse_proxy @status {upstream}
 
-    print("Flask app and templates/static files generated. Run 'python app.py' and navigate to http://127.0.0.1:5000")
-    app.run(debug=True) # debug=True for development, set to False in production
\ No newline at end of file
+    @immutable path_regexp \\.[0-9a-f]{{10}}\\.[a-z0-9]+$
+    header @immutable Cache-Control "public, max-age=31536000, immutable"
+
+    file_server {{
+        precompressed br gzip
+    }}
+}}
+"""
+
+def freeze_site(output_dir, upstream='127.0.0.1:8000'):
+    """Exports the pages and static files to output_dir; returns the manifest."""
+    output_dir = os.path.abspath(output_dir)
+    build_assets()
+    manifest = {'pages': {}, 'dynamic': list(DYNAMIC_ROUTES), 'upstream': upstream,
+                'proxy_count': 1}
+
+    with internal_client() as client:
+        for path, filename in FROZEN_PAGES:
+            response = client.get(path)
+            if response.status_code != 200:
+                raise RuntimeError(f"{path} returned {response.status_code}")
+            body = response.get_data()
+            target = os.path.join(output_dir, filename)
+            _write_if_changed(target, body)
+            _write_if_changed(target + '.gz', _compress(body, 'gzip', 'best'))
+            if brotli is not None:
+                _write_if_changed(target + '.br', _compress(body, 'br', 'best'))
+            manifest['pages'][path] = {'file': filename, 'etag': response.headers.get('ETag')}
+
+    static_url = app.static_url_path.strip('/')
+    for dirpath, _, filenames in os.walk(app.static_folder):
+        for filename in filenames:
+            source = os.path.join(dirpath, filename)
+            relative = os.path.relpath(source, app.static_folder)
+            if relative == ASSET_MANIFEST or filename.startswith('.tmp-'):
+                continue
+            target = os.path.join(output_dir, static_url, relative)
+            try:
+                st = os.stat(target)
+                if st.st_size == os.stat(source).st_size and \
+                        st.st_mtime_ns == os.stat(source).st_mtime_ns:
+                    continue
+            except FileNotFoundError:
+                os.makedirs(os.path.dirname(target), exist_ok=True)
+            shutil.copy2(source, target)
+    manifest['immutable'] = sorted(f'/{static_url}/{name}' for name in _hashed_assets())
+
+    dynamic = ''.join(f'\nlocation = {route} {{\n    proxy_pass http://{upstream};\n}}\n'
+                      for route in DYNAMIC_ROUTES)
+    _write_if_changed(os.path.join(output_dir, 'nginx.conf'),
+                      _NGINX_TEMPLATE.format(root=output_dir, upstream=upstream,
+                                             dynamic=dynamic))
+    _write_if_changed(os.path.join(output_dir, 'Caddyfile'),
+                      _CADDY_TEMPLATE.format(root=output_dir, upstream=upstream,
+                                             paths=' '.join(DYNAMIC_ROUTES)))
+    _write_if_changed(os.path.join(output_dir, 'freeze.json'),
+                      json.dumps(manifest, indent=2, sort_keys=True))
+    return manifest
+
+@app.cli.command('freeze')
+@click.argument('output_dir', default='build')
+@click.option('--upstream', default='127.0.0.1:8000',
+              help='Address of the app server that handles the dynamic routes.')
+def freeze_command(output_dir, upstream):
+    """Exports the static pages and assets for serving from disk or a CDN."""
+    manifest = freeze_site(output_dir, upstream)
+    print(f"Froze {len(manifest['pages'])} pages and {len(manifest['immutable'])} "
+          f"hashed assets to {os.path.abspath(output_dir)}")
+    print("Run the app with PROXY_COUNT=1 behind the generated nginx/Caddy configuration.")
+
+# --- Production server ---
+# ``serve`` runs the app under gunicorn's prefork server. The module is
+# imported and the page cache warmed in the master process before any worker
+# is forked, and the heap is then frozen out of the garbage collector, so
+# workers share all of it copy-on-write. SIGTERM shuts down gracefully. Because
+# the app is preloaded, SIGHUP only re-forks workers from the code the master
+# already imported; to deploy new code restart the server, or send the master
+# SIGUSR2 (which re-executes it with the new code next to the old one), then
+# SIGTERM to the old master once the new workers are up. Workers are recycled
+# after SERVE_MAX_REQUESTS requests (plus jitter) to bound memory growth.
+app.config.update(
+    SERVE_BIND='127.0.0.1:8000',
+    SERVE_WORKERS=(os.cpu_count() or 1) * 2 + 1,
+    SERVE_THREADS=4,
+    SERVE_KEEPALIVE=5,
+    SERVE_MAX_REQUESTS=10000,
+    SERVE_MAX_REQUESTS_JITTER=1000,
+    SERVE_TIMEOUT=30,
+    SERVE_GRACEFUL_TIMEOUT=30,
+)
+
+def warm_caches():
+    """Renders the cacheable pages once so forked workers inherit them."""
+    with internal_client() as client:
+        for path in ('/', '/about', '/contact-success'):
+            client.get(path)
+
+def serve(**overrides):
+    """Runs the app under gunicorn with the SERVE_* settings (or overrides)."""
+    try:
+        from gunicorn.app.base import BaseApplication
+    except ImportError:
+        raise SystemExit("gunicorn is not installed. Install it with 'pip install gunicorn' to use 'serve'.")
+
+    settings = {key[len('SERVE_'):].lower(): value
+                for key, value in app.config.items() if key.startswith('SERVE_')}
+    settings.update((key, value) for key, value in overrides.items() if value is not None)
+    options = {
+        'bind': settings['bind'],
+        'workers': settings['workers'],
+        'threads': settings['threads'],
+        'worker_class': 'gthread' if settings['threads'] > 1 else 'sync',
+        'keepalive': settings['keepalive'],
+        'max_requests': settings['max_requests'],
+        'max_requests_jitter': settings['max_requests_jitter'],
+        'timeout': settings['timeout'],
+        'graceful_timeout': settings['graceful_timeout'],
+        'preload_app': True,
+        'when_ready': lambda server: gc.freeze(),
+        'worker_exit': lambda server, worker: metrics.close(),
+        'child_exit': lambda server, worker: metrics.fold_exited(worker.pid),
+    }
+
+    class PreforkServer(BaseApplication):
+        def load_config(self):
+            for key, value in options.items():
+                self.cfg.set(key, value)
+
+        def load(self):
+            return app
+
+    # Shared-memory tables have to exist before the first fork
+    rate_limiter.prepare()
+    warm_caches()
+    # Set after warming up, so only the workers flush snapshots
+    metrics_dir = app.config['METRICS_DIR']
+    if metrics_dir:
+        for entry in os.scandir(metrics_dir):
+            if entry.name.endswith('.json'):
+                os.unlink(entry.path)
+    else:
+        app.config['METRICS_DIR'] = tempfile.mkdtemp(prefix='metrics-')
+    master_pid = os.getpid()
+    try:
+        PreforkServer().run()
+    finally:
+        # Workers exit through here too (gunicorn forks inside run())
+        if not metrics_dir and os.getpid() == master_pid:
+            shutil.rmtree(app.config['METRICS_DIR'], ignore_errors=True)
+            app.config['METRICS_DIR'] = None
+
+@app.cli.command('serve')
+@click.option('--bind', '-b', help='Address to listen on, e.g. 0.0.0.0:8000.')
+@click.option('--workers', '-w', type=int, help='Number of worker processes.')
+@click.option('--threads', type=int, help='Threads per worker.')
+@click.option('--keepalive', type=int, help='Seconds to hold idle keep-alive connections.')
+@click.option('--max-requests', type=int, help='Requests before a worker is recycled.')
+def serve_command(**options):
+    """Runs the app under a prefork multi-process server."""
+    serve(**options)
+
+# --- Main execution ---
+if __name__ == '__main__':
+    if sys.argv[1:2] == ['generate']:
+        written = generate_site()
+        print(f"Generated site files ({len(written)} changed). Run 'python index.py' and navigate to http://127.0.0.1:5000")
+    elif sys.argv[1:2] == ['serve']:
+        serve()
+    elif sys.argv[1:2] == ['freeze']:
+        freeze_site(sys.argv[2] if len(sys.argv) > 2 else 'build')
+    else:
+        app.run(debug=True) # debug=True for development, set to False in production
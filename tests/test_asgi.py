@@ -0,0 +1,86 @@
+"""The native ASGI contact handlers, including when mounted under a prefix."""
+import asyncio
+import itertools
+import json
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+import index  # noqa: E402
+
+
+@pytest.fixture
+def app(tmp_path):
+    app = index.app
+    saved = dict(app.config)
+    app.config.update(
+        TESTING=True,
+        RATELIMIT_ENABLED=False,
+        MAIL_SERVER=None,
+        CONTACT_DB_PATH=str(tmp_path / 'contact.sqlite3'),
+        CONTACT_FLUSH_INTERVAL=0.01,
+        LOG_PATH=str(tmp_path / 'app.log'),
+    )
+    yield app
+    index.submissions.close()
+    app.config.clear()
+    app.config.update(saved)
+
+
+def call(asgi_app, path, body, content_type, root_path=''):
+    """Runs one POST through asgi_app; returns (status, headers, body)."""
+    scope = {'type': 'http', 'method': 'POST', 'path': path, 'root_path': root_path,
+             'query_string': b'', 'client': ('203.0.113.9', 4000),
+             'headers': [(b'content-type', content_type.encode())]}
+    events = [{'type': 'http.request', 'body': body, 'more_body': False}]
+    sent = []
+
+    async def receive():
+        return events.pop(0) if events else {'type': 'http.disconnect'}
+
+    async def send(event):
+        sent.append(event)
+
+    asyncio.run(asgi_app(scope, receive, send))
+    start = sent[0]
+    headers = {k.decode(): v.decode() for k, v in start['headers']}
+    return start['status'], headers, b''.join(event.get('body', b'') for event in sent[1:])
+
+
+_serial = itertools.count()
+
+
+def api_body():
+    return json.dumps({'name': 'Tester', 'email': 'tester@example.com',
+                       'message': f'ASGI message {next(_serial)}'}).encode()
+
+
+@pytest.mark.parametrize('root_path', ['', '/site'])
+def test_contact_routes_are_handled_natively(app, root_path):
+    asgi_app = index.ContactASGIApp(app)
+    status, headers, body = call(asgi_app, root_path + '/api/contact', api_body(),
+                                 'application/json', root_path)
+    assert status == 202
+    assert json.loads(body)['status'] == 'accepted'
+    status, headers, _ = call(asgi_app, root_path + '/contact',
+                              b'name=Tester&email=tester%40example.com&message=Form+'
+                              + str(next(_serial)).encode(),
+                              'application/x-www-form-urlencoded', root_path)
+    assert status == 302
+    assert headers['location'] == root_path + '/contact-success'
+    # Neither request fell through to the WSGI app
+    assert asgi_app._wsgi is None
+
+
+def test_rate_limited_response_headers(app, monkeypatch):
+    app.config.update(RATELIMIT_ENABLED=True, RATELIMIT_BURST=1)
+    monkeypatch.setattr(index.rate_limiter, '_table', index.TokenBucketTable(64))
+    asgi_app = index.ContactASGIApp(app)
+    assert call(asgi_app, '/api/contact', api_body(), 'application/json')[0] == 202
+    status, headers, body = call(asgi_app, '/api/contact', api_body(), 'application/json')
+    assert status == 429
+    assert headers['content-type'] == 'application/json'
+    assert int(headers['retry-after']) > 0
+    assert json.loads(body)['status'] == 'rate_limited'
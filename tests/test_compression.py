@@ -0,0 +1,80 @@
+"""Compressed page responses, their ETags and conditional requests."""
+import gzip
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+import index  # noqa: E402
+
+
+@pytest.fixture
+def client():
+    index.app.config['TESTING'] = True
+    return index.app.test_client()
+
+
+def identity(client, path='/'):
+    response = client.get(path)
+    assert 'Content-Encoding' not in response.headers
+    return response
+
+
+def test_page_is_gzipped_with_an_encoded_etag(client):
+    plain = identity(client)
+    response = client.get('/', headers={'Accept-Encoding': 'gzip'})
+    assert response.status_code == 200
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert 'Accept-Encoding' in response.headers['Vary']
+    assert response.headers['ETag'] == plain.headers['ETag'][:-1] + '-gzip"'
+    assert gzip.decompress(response.get_data()) == plain.get_data()
+    assert int(response.headers['Content-Length']) == len(response.get_data())
+
+
+def test_brotli_is_preferred_when_available(client):
+    brotli = pytest.importorskip('brotli')
+    plain = identity(client)
+    response = client.get('/', headers={'Accept-Encoding': 'gzip, br'})
+    assert response.headers['Content-Encoding'] == 'br'
+    assert response.headers['ETag'].endswith('-br"')
+    assert brotli.decompress(response.get_data()) == plain.get_data()
+
+
+def test_encoded_etag_is_answered_with_304(client):
+    etag = client.get('/', headers={'Accept-Encoding': 'gzip'}).headers['ETag']
+    response = client.get('/', headers={'Accept-Encoding': 'gzip', 'If-None-Match': etag})
+    assert response.status_code == 304
+    assert response.headers['ETag'] == etag
+    assert 'Accept-Encoding' in response.headers['Vary']
+    assert response.get_data() == b''
+
+
+def test_encoded_etag_does_not_match_another_encoding(client):
+    pytest.importorskip('brotli')
+    etag = client.get('/', headers={'Accept-Encoding': 'gzip'}).headers['ETag']
+    response = client.get('/', headers={'Accept-Encoding': 'br', 'If-None-Match': etag})
+    assert response.status_code == 200
+    assert response.headers['Content-Encoding'] == 'br'
+    # Nor the identity representation
+    response = client.get('/', headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert 'Content-Encoding' not in response.headers
+
+
+def test_compressed_pages_are_cached_per_encoding(client):
+    first = client.get('/about', headers={'Accept-Encoding': 'gzip'}).get_data()
+    middleware = index.app.wsgi_app
+    while not isinstance(middleware, index.CompressionMiddleware):
+        middleware = middleware.wsgi_app
+    etag = identity(client, '/about').headers['ETag']
+    key = ('/about', 'gzip', etag)
+    assert middleware._cache[key] == first
+    assert client.get('/about', headers={'Accept-Encoding': 'gzip'}).get_data() == first
+
+
+def test_non_html_and_small_responses_are_left_alone(client):
+    response = client.get('/metrics', headers={'Accept-Encoding': 'gzip'})
+    assert 'Content-Encoding' not in response.headers
+    response = client.post('/api/contact', json={}, headers={'Accept-Encoding': 'gzip'})
+    assert 'Content-Encoding' not in response.headers
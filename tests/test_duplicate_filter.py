@@ -0,0 +1,110 @@
+"""Rolling Bloom filter rotation and the duplicate filter's audit."""
+import os
+import sys
+import types
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+import index  # noqa: E402
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(index, 'time', types.SimpleNamespace(monotonic=clock))
+    return clock
+
+
+def digest(text):
+    return index.DuplicateFilter.digest('Name', 'name@example.com', text)
+
+
+def make_filter(**config):
+    settings = dict(DEDUP_WINDOW=60, DEDUP_CAPACITY=1000, DEDUP_ERROR_RATE=0.001,
+                    DEDUP_AUDIT_RATE=0.0, DEDUP_AUDIT_SIZE=4096)
+    settings.update(config)
+    return index.DuplicateFilter(types.SimpleNamespace(config=settings))
+
+
+def test_bloom_remembers_for_one_to_two_windows(clock):
+    bloom = index.RollingBloomFilter(1000, 0.001, 60)
+    assert not bloom.add(digest('a'))
+    assert bloom.add(digest('a'))
+    clock.now += 60
+    # Rotated into the previous generation, still remembered
+    assert digest('a') in bloom
+    assert not bloom.add(digest('b'))
+    clock.now += 60
+    assert digest('a') not in bloom
+    assert digest('b') in bloom
+
+
+def test_bloom_forgets_everything_after_two_idle_windows(clock):
+    bloom = index.RollingBloomFilter(1000, 0.001, 60)
+    bloom.add(digest('a'))
+    clock.now += 120
+    assert digest('a') not in bloom
+    assert len(bloom) == 0
+
+
+def test_bloom_rotates_when_a_generation_fills(clock):
+    bloom = index.RollingBloomFilter(3, 0.001, 60)
+    for text in 'abc':
+        bloom.add(digest(text))
+    assert len(bloom) == 3
+    bloom.add(digest('d'))
+    assert len(bloom) == 4
+    assert all(digest(text) in bloom for text in 'abcd')
+    for text in 'efg':
+        bloom.add(digest(text))
+    # 'a' to 'c' have dropped out with the oldest generation
+    assert not any(digest(text) in bloom for text in 'abc')
+    assert all(digest(text) in bloom for text in 'defg')
+
+
+def test_only_remembered_submissions_are_duplicates(clock):
+    dedup = make_filter()
+    fields = ('Name', 'name@example.com', 'Hello')
+    assert not dedup.is_duplicate(*fields)
+    # Not remembered yet (e.g. turned away as busy), so a retry gets through
+    assert not dedup.is_duplicate(*fields)
+    dedup.remember(*fields)
+    assert dedup.is_duplicate('  name ', 'NAME@example.com', 'hello')
+    assert dedup.stats()['accepted'] == 1
+    assert dedup.stats()['dropped'] == 1
+
+
+def test_audited_false_positive_is_let_through(clock):
+    # One hash over a small filter, so colliding messages are easy to find
+    dedup = make_filter(DEDUP_ERROR_RATE=0.5, DEDUP_AUDIT_RATE=1.0)
+    dedup.remember('Name', 'name@example.com', 'original')
+    bloom = dedup._filter()
+    text = next(f'other {i}' for i in range(1000000)
+                if digest(f'other {i}') in bloom)
+    assert not dedup.is_duplicate('Name', 'name@example.com', text)
+    assert dedup.is_duplicate('Name', 'name@example.com', 'original')
+    stats = dedup.stats()
+    assert stats['audited'] == 2
+    assert stats['false_positives'] == 1
+    assert stats['dropped'] == 1
+
+
+def test_audit_hit_outside_the_exact_record_is_unverified(clock):
+    dedup = make_filter(DEDUP_AUDIT_RATE=1.0, DEDUP_AUDIT_SIZE=1)
+    dedup.remember('Name', 'name@example.com', 'first')
+    dedup.remember('Name', 'name@example.com', 'second')
+    # 'first' has left the exact record, so the hit cannot be checked
+    assert dedup.is_duplicate('Name', 'name@example.com', 'first')
+    stats = dedup.stats()
+    assert stats['unverified'] == 1
+    assert stats['false_positives'] == 0
+    assert stats['dropped'] == 1
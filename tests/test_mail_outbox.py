@@ -0,0 +1,155 @@
+"""Outbox delivery against a local aiosmtpd server."""
+import itertools
+import os
+import socket
+import sys
+import time
+
+import pytest
+
+aiosmtpd_controller = pytest.importorskip('aiosmtpd.controller')
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+import index  # noqa: E402
+
+
+class RecordingHandler:
+    def __init__(self):
+        self.envelopes = []
+
+    async def handle_DATA(self, server, session, envelope):
+        self.envelopes.append(envelope)
+        return '250 OK'
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def wait_for(predicate, timeout=10):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.05)
+    return False
+
+
+def outbox_rows(path):
+    conn = index.open_database(path)
+    try:
+        return conn.execute('SELECT status, attempts, next_attempt FROM outbox '
+                            'ORDER BY id').fetchall()
+    finally:
+        conn.close()
+
+
+@pytest.fixture
+def smtp_port():
+    return free_port()
+
+
+@pytest.fixture
+def smtp_server(smtp_port):
+    handler = RecordingHandler()
+    controller = aiosmtpd_controller.Controller(handler, hostname='127.0.0.1', port=smtp_port)
+    controller.start()
+    yield handler
+    controller.stop()
+
+
+@pytest.fixture
+def app(tmp_path, smtp_port):
+    app = index.app
+    saved = dict(app.config)
+    app.config.update(
+        TESTING=True,
+        RATELIMIT_ENABLED=False,
+        CONTACT_DB_PATH=str(tmp_path / 'contact.sqlite3'),
+        CONTACT_FLUSH_INTERVAL=0.01,
+        LOG_PATH=str(tmp_path / 'app.log'),
+        MAIL_SERVER='127.0.0.1',
+        MAIL_PORT=smtp_port,
+        MAIL_TIMEOUT=2,
+        MAIL_RECIPIENTS=['owner@example.com'],
+        MAIL_RETRY_BASE=0.01,
+        MAIL_RETRY_MAX=0.05,
+        MAIL_MAX_ATTEMPTS=3,
+        MAIL_POLL_INTERVAL=0.05,
+    )
+    yield app
+    index.submissions.close()
+    index.mail_outbox.close()
+    app.config.clear()
+    app.config.update(saved)
+
+
+_serial = itertools.count()
+
+
+def submit(client, n):
+    # Unique messages, so the duplicate filter lets every one through
+    for _ in range(n):
+        response = client.post('/api/contact', json={
+            'name': 'Tester', 'email': 'tester@example.com',
+            'message': f'Message {next(_serial)}'})
+        assert response.status_code == 202
+
+
+def test_delivers_submissions(app, smtp_server):
+    submit(app.test_client(), 3)
+    assert wait_for(lambda: len(smtp_server.envelopes) == 3)
+    assert wait_for(lambda: [row[0] for row in outbox_rows(app.config['CONTACT_DB_PATH'])]
+                    == ['sent'] * 3)
+    envelope = smtp_server.envelopes[0]
+    assert envelope.rcpt_tos == ['owner@example.com']
+    assert b'Reply-To: tester@example.com' in envelope.content
+
+
+def test_retries_with_backoff_then_gives_up(app):
+    # Nothing listens on MAIL_PORT
+    submit(app.test_client(), 1)
+    path = app.config['CONTACT_DB_PATH']
+    assert wait_for(lambda: outbox_rows(path) and outbox_rows(path)[0][1] >= 1)
+    status, attempts, next_attempt = outbox_rows(path)[0]
+    if status == 'pending':
+        assert next_attempt > time.time() - 1
+    assert wait_for(lambda: outbox_rows(path)[0][:2] == ('failed', 3))
+
+
+def test_sends_rows_left_pending_by_previous_run(app, smtp_port):
+    app.config['MAIL_MAX_ATTEMPTS'] = 1000
+    submit(app.test_client(), 5)
+    path = app.config['CONTACT_DB_PATH']
+    assert wait_for(lambda: len(outbox_rows(path)) == 5
+                    and all(row[1] >= 1 for row in outbox_rows(path)))
+
+    # Restart with the server up: no new submission, just any request
+    index.submissions.close()
+    index.mail_outbox.close()
+    handler = RecordingHandler()
+    controller = aiosmtpd_controller.Controller(handler, hostname='127.0.0.1', port=smtp_port)
+    controller.start()
+    try:
+        app.test_client().get('/about')
+        assert wait_for(lambda: len(handler.envelopes) == 5)
+        assert wait_for(lambda: [row[0] for row in outbox_rows(path)] == ['sent'] * 5)
+    finally:
+        controller.stop()
+
+
+def test_sender_recovers_when_database_becomes_available(app, smtp_server, tmp_path):
+    directory = tmp_path / 'later'
+    app.config.update(CONTACT_DB_PATH=str(directory / 'contact.sqlite3'),
+                      CONTACT_RETRY_INTERVAL=0.05)
+    client = app.test_client()
+    # Starts the sender while the database directory is missing
+    client.get('/about')
+    time.sleep(0.2)
+    directory.mkdir()
+    submit(client, 1)
+    assert wait_for(lambda: len(smtp_server.envelopes) == 1)
+    assert wait_for(lambda: [row[0] for row in outbox_rows(app.config['CONTACT_DB_PATH'])]
+                    == ['sent'])
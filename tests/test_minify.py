@@ -0,0 +1,33 @@
+"""CSS and JS minification leaves strings and literals alone."""
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+from index import minify_css, minify_js  # noqa: E402
+
+
+def test_css_strips_comments_and_whitespace():
+    css = 'a , b > c {\n  color : red ;\n  margin: 0 auto;\n}\n/* note */\n'
+    assert minify_css(css) == 'a,b>c{color :red;margin:0 auto}'
+
+
+def test_css_keeps_strings_and_urls():
+    css = ('a::before { content: " > /* x */ "; }\n'
+           '[title="x, y"] { background: url( "a b.png" ); }\n'
+           '.i { background: url(data:image/svg+xml;utf8,<svg a="b"/>); }')
+    assert minify_css(css) == ('a::before{content:" > /* x */ "}'
+                               '[title="x, y"]{background:url( "a b.png" )}'
+                               '.i{background:url(data:image/svg+xml;utf8,<svg a="b"/>)}')
+
+
+def test_js_keeps_lines_and_drops_comments():
+    js = '// header\nfunction f(a) {\n    return a; // done\n    /* gone */\n}\n'
+    assert minify_js(js) == 'function f(a) {\nreturn a;\n}'
+
+
+def test_js_keeps_strings_and_literals():
+    assert minify_js("var s = '/* x */';") == "var s = '/* x */';"
+    js = ('var r = /[/*]"/g;\n'
+          'var t = `one\n    // two`;\n'
+          'var q = a / b / 2 + "c // d";\n')
+    assert minify_js(js) == js.strip()
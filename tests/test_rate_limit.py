@@ -0,0 +1,100 @@
+"""Token-bucket refill and eviction in both bucket tables."""
+import os
+import sys
+import types
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+import index  # noqa: E402
+
+TABLES = (index.TokenBucketTable, index.SharedTokenBucketTable)
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(index, 'time', types.SimpleNamespace(monotonic=clock))
+    return clock
+
+
+@pytest.mark.parametrize('table_class', TABLES)
+def test_burst_then_refill(clock, table_class):
+    table = table_class(64)
+    assert [table.hit('a', 1.0, 3) for _ in range(3)] == [0.0] * 3
+    assert table.hit('a', 1.0, 3) == pytest.approx(1.0)
+    clock.now += 0.5
+    assert table.hit('a', 1.0, 3) == pytest.approx(0.5)
+    clock.now += 0.5
+    assert table.hit('a', 1.0, 3) == 0.0
+    # Other keys have their own bucket
+    assert table.hit('b', 1.0, 3) == 0.0
+
+
+@pytest.mark.parametrize('table_class', TABLES)
+def test_refill_is_capped_at_burst(clock, table_class):
+    table = table_class(64)
+    table.hit('a', 1.0, 2)
+    clock.now += 3600
+    assert [table.hit('a', 1.0, 2) for _ in range(2)] == [0.0] * 2
+    assert table.hit('a', 1.0, 2) > 0
+
+
+def test_memory_table_evicts_least_recently_used(clock):
+    table = index.TokenBucketTable(2)
+    rate = 1e-6
+    assert table.hit('a', rate, 1) == 0.0
+    clock.now += 1
+    assert table.hit('b', rate, 1) == 0.0
+    clock.now += 1
+    # Touching 'a' makes 'b' the oldest
+    assert table.hit('a', rate, 1) > 0
+    assert table.hit('c', rate, 1) == 0.0
+    assert table.hit('a', rate, 1) > 0
+    assert table.hit('b', rate, 1) == 0.0
+
+
+def test_shared_table_evicts_oldest_way_of_a_full_set(clock):
+    # One set of WAYS entries, so every key competes for the same ways
+    ways = index.SharedTokenBucketTable.WAYS
+    table = index.SharedTokenBucketTable(ways)
+    rate = 1e-6
+    keys = [f'k{i}' for i in range(ways)]
+    for key in keys:
+        assert table.hit(key, rate, 1) == 0.0
+        clock.now += 1
+    assert table.hit(keys[0], rate, 1) > 0
+    clock.now += 1
+    # keys[1] is now the least recently used and gives way
+    assert table.hit('new', rate, 1) == 0.0
+    assert table.hit(keys[0], rate, 1) > 0
+    assert all(table.hit(key, rate, 1) > 0 for key in keys[2:])
+    assert table.hit(keys[1], rate, 1) == 0.0
+
+
+@pytest.mark.skipif(not hasattr(os, 'fork'), reason='needs fork()')
+def test_shared_table_is_enforced_across_fork(clock):
+    table = index.SharedTokenBucketTable(64)
+    pid = os.fork()
+    if pid == 0:
+        os._exit(0 if table.hit('a', 1e-6, 1) == 0.0 else 1)
+    _, status = os.waitpid(pid, 0)
+    assert os.WEXITSTATUS(status) == 0
+    # The child's hit used up the only token
+    assert table.hit('a', 1e-6, 1) > 0
+
+
+def test_keys_aggregate_addresses_to_subnets():
+    assert index.address_key('203.0.113.7') == '203.0.113.7/32'
+    assert (index.address_key('2001:db8:1:2::1') == index.address_key('2001:db8:1:2:ffff::9')
+            == '2001:db8:1:2::/64')
+    assert index.address_key('2001:db8:1:3::1') != index.address_key('2001:db8:1:2::1')
+    assert index.address_key('not-an-address') == 'not-an-address'
@@ -0,0 +1,86 @@
+"""Contact submission writer: storing, and surviving database failures."""
+import itertools
+import os
+import sys
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+import index  # noqa: E402
+
+
+def wait_for(predicate, timeout=10):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.02)
+    return False
+
+
+def stored_messages(path):
+    conn = index.open_database(path)
+    try:
+        return [row[0] for row in conn.execute('SELECT message FROM submissions ORDER BY id')]
+    finally:
+        conn.close()
+
+
+@pytest.fixture
+def app(tmp_path):
+    app = index.app
+    saved = dict(app.config)
+    app.config.update(
+        TESTING=True,
+        RATELIMIT_ENABLED=False,
+        MAIL_SERVER=None,
+        CONTACT_DB_PATH=str(tmp_path / 'contact.sqlite3'),
+        CONTACT_FLUSH_INTERVAL=0.01,
+        CONTACT_RETRY_INTERVAL=0.05,
+        LOG_PATH=str(tmp_path / 'app.log'),
+    )
+    yield app
+    index.submissions.close()
+    app.config.clear()
+    app.config.update(saved)
+
+
+_serial = itertools.count()
+
+
+def post(client):
+    message = f'Queued message {next(_serial)}'
+    response = client.post('/api/contact', json={
+        'name': 'Tester', 'email': 'tester@example.com', 'message': message})
+    return response.status_code, message
+
+
+def test_stores_submissions(app):
+    client = app.test_client()
+    sent = [post(client) for _ in range(3)]
+    assert [status for status, _ in sent] == [202] * 3
+    assert wait_for(lambda: stored_messages(app.config['CONTACT_DB_PATH'])
+                    == [message for _, message in sent])
+
+
+def test_failed_commit_is_retried_and_turns_new_submissions_away(app):
+    path = app.config['CONTACT_DB_PATH']
+    conn = index.open_database(path)
+    conn.execute("CREATE TRIGGER refuse BEFORE INSERT ON submissions "
+                 "BEGIN SELECT RAISE(ABORT, 'disk full'); END")
+    conn.commit()
+    client = app.test_client()
+    status, kept = post(client)
+    assert status == 202
+    assert wait_for(lambda: not index.submissions.healthy)
+    assert post(client)[0] == 503
+
+    conn.execute('DROP TRIGGER refuse')
+    conn.commit()
+    conn.close()
+    assert wait_for(lambda: index.submissions.healthy)
+    assert wait_for(lambda: stored_messages(path) == [kept])
+    status, later = post(client)
+    assert status == 202
+    assert wait_for(lambda: stored_messages(path) == [kept, later])